@@ -97,6 +97,28 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Dipakai untuk ringkasan dashboard (finance.dashboard_cache) dan lookup akun
+# (finance.akun_lookup). Versi invalidasinya disimpan di cache ini, jadi backend
+# HARUS dibagi semua worker (gunicorn/PythonAnywhere): default file-based.
+# LocMemCache hanya cocok untuk satu proses (check finance.W001 akan memperingatkan).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / '.django_cache')),
+    }
+}
+
+
+# Audit Log
+# AUDIT_ASYNC = True → event audit ditulis ke AuditOutbox di transaksi yang sama dengan save() datanya
+# (model finance: AuditOutboxAtomikMixin; auth.User: bungkus dengan transaction.atomic() di pemanggil),
+# lalu dipindahkan ke hash chain oleh `python manage.py audit_outbox_worker`.
+AUDIT_ASYNC = os.environ.get('AUDIT_ASYNC', '') == '1'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -54,7 +54,7 @@ class OpsInboundAdmin(admin.ModelAdmin):
 
 @admin.register(OpsManifest)
 class OpsManifestAdmin(admin.ModelAdmin):
-    list_display = ('nomor_manifest', 'tanggal', 'armada', 'rute', 'status')
+    list_display = ('nomor_manifest', 'tanggal', 'armada', 'rute', 'jumlah_barang', 'total_berat', 'status')
     list_filter = ('status', 'tanggal')
     search_fields = ('nomor_manifest', 'armada', 'rute')
 
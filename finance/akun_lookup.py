@@ -0,0 +1,90 @@
+"""
+Cache resolusi akun untuk signal auto-jurnal.
+
+Setiap signal (inbound, manifest, cashbon, gaji) butuh akun "peran" tertentu —
+Piutang Usaha, Pendapatan Inbound, Hutang Vendor, Kas, dst. — yang dicari
+lewat kode lalu fallback nama. Tanpa cache, import ribuan inbound berarti
+ribuan query Akun yang hasilnya selalu sama.
+
+Akun yang ketemu disimpan per proses bersama "versi" dari shared cache
+(settings.CACHES). Setiap Akun disimpan/dihapus, versi diganti (sekarang dan
+setelah commit) sehingga proses lain ikut membuang hasil lamanya — misal
+fallback 514 yang tersimpan sebelum akun 505 dibuat. Hasil "tidak ketemu"
+tidak di-cache: akun yang baru dibuat di proses lain langsung terlihat.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+# Urutan fallback per peran: ('kode', nilai) = Akun.objects.get(kode=...),
+# ('nama', nilai) = Akun.objects.filter(nama__icontains=...).first()
+PERAN_AKUN = {
+    'piutang_usaha': [('kode', '112'), ('nama', 'Piutang')],
+    'pendapatan_inbound': [('kode', '402'), ('kode', '401')],
+    'hutang_vendor': [('kode', '211'), ('nama', 'Hutang')],
+    'beban_pengiriman': [('kode', '505'), ('nama', 'Biaya Pengiriman Vendor'), ('kode', '514'), ('nama', 'Pengiriman')],
+    'beban_dp_manifest': [('kode', '505'), ('nama', 'Biaya Pengiriman Vendor'), ('kode', '514'), ('kode', '115')],
+    'kas': [('kode', '101'), ('nama', 'Kas')],
+    'biaya_gaji': [('kode', '501'), ('nama', 'Gaji')],
+    'piutang_karyawan': [('kode', '113'), ('nama', 'Karyawan')],
+}
+
+VERSI_KEY = 'akun_lookup:versi'
+
+_cache = {}  # {peran: (versi, akun)}
+_lock = threading.Lock()
+
+
+def _versi_sekarang():
+    """Versi cache akun di shared cache; buat baru jika belum ada (atau ter-evict)."""
+    versi = cache.get(VERSI_KEY)
+    if versi is None:
+        cache.add(VERSI_KEY, time.time_ns(), None)
+        versi = cache.get(VERSI_KEY)
+    return versi
+
+
+def _cari(peran):
+    from .models import Akun
+
+    for jenis, nilai in PERAN_AKUN[peran]:
+        if jenis == 'kode':
+            akun = Akun.objects.filter(kode=nilai).first()
+        else:
+            akun = Akun.objects.filter(nama__icontains=nilai).first()
+        if akun:
+            return akun
+    return None
+
+
+def get_akun(peran):
+    """Akun untuk peran tertentu (lihat PERAN_AKUN), atau None jika tidak ada."""
+    versi = _versi_sekarang()
+    with _lock:
+        lokal = _cache.get(peran)
+    if lokal and lokal[0] == versi:
+        return lokal[1]
+    akun = _cari(peran)
+    if akun is not None:
+        with _lock:
+            _cache[peran] = (versi, akun)
+    return akun
+
+
+def reset_cache_akun():
+    """Kosongkan cache di semua proses (ganti versi di shared cache)."""
+    cache.set(VERSI_KEY, time.time_ns(), None)
+    with _lock:
+        _cache.clear()
+
+
+@receiver(post_save, sender='finance.Akun')
+@receiver(post_delete, sender='finance.Akun')
+def reset_cache_akun_on_change(sender, **kwargs):
+    """Invalidasi sekarang dan sekali lagi setelah commit (proses lain mungkin sempat membaca data lama)."""
+    reset_cache_akun()
+    transaction.on_commit(reset_cache_akun)
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class FinanceConfig(AppConfig):
@@ -7,5 +8,21 @@ class FinanceConfig(AppConfig):
     verbose_name = 'Sistem Akuntansi BMM Cargo'
 
     def ready(self):
-        """Import signals saat app sudah siap agar audit log aktif."""
+        """Import signals saat app sudah siap agar audit log & invalidasi cache aktif."""
         import finance.signals  # noqa: F401
+        import finance.dashboard_cache  # noqa: F401
+
+
+@checks.register(checks.Tags.caches)
+def cek_cache_dibagi(app_configs, **kwargs):
+    """Versi invalidasi cache dashboard & akun harus terlihat semua worker."""
+    from django.conf import settings
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.endswith(('LocMemCache', 'DummyCache')):
+        return [checks.Warning(
+            'CACHES["default"] memakai cache per-proses; invalidasi ringkasan dashboard '
+            'dan lookup akun tidak sampai ke worker lain.',
+            hint='Gunakan FileBasedCache, DatabaseCache, Redis atau Memcached.',
+            id='finance.W001',
+        )]
+    return []
@@ -0,0 +1,107 @@
+"""
+Backup blockchain AuditLog secara streaming.
+
+Blok dibaca per halaman keyset, ditulis sebagai NDJSON (satu blok per baris)
+langsung ke entry ZIP yang di-stream ke klien/file. SHA-256 sertifikat dihitung
+berjalan selama byte mengalir — tidak ada salinan penuh chain di memori.
+
+Backup inkremental (`sejak=N`) hanya berisi blok dengan block_index > N;
+sertifikat mencatat previous_hash blok pertama agar bisa disambung ke backup
+sebelumnya.
+"""
+import hashlib
+import json
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+BACKUP_CHUNK_SIZE = 2000
+BACKUP_FIELDS = (
+    'block_index', 'block_hash', 'previous_hash', 'user_id', 'action', 'model_name',
+    'object_id', 'object_repr', 'changes', 'timestamp',
+)
+
+
+class _ZipStream:
+    """File-like tulis-saja untuk ZipFile: byte ditampung lalu diambil per potongan."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _iter_rows(sejak):
+    """Baris values() AuditLog urut block_index, keyset per BACKUP_CHUNK_SIZE."""
+    from .models import AuditLog
+
+    last_index = sejak
+    while True:
+        rows = list(
+            AuditLog.objects.filter(block_index__gt=last_index)
+            .order_by('block_index').values(*BACKUP_FIELDS)[:BACKUP_CHUNK_SIZE]
+        )
+        yield from rows
+        if len(rows) < BACKUP_CHUNK_SIZE:
+            return
+        last_index = rows[-1]['block_index']
+
+
+def backup_filename(sejak=0):
+    jenis = f"inkremental_sejak_{sejak}" if sejak else "penuh"
+    return f"blockchain_backup_{jenis}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+
+def iter_backup_zip(sejak=0):
+    """
+    Generator potongan byte file ZIP backup:
+    - blockchain_backup.ndjson : satu blok per baris
+    - merkle_roots.json        : root segmen Merkle tersegel
+    - hash_certificate.txt     : SHA-256 isi NDJSON + rentang blok
+    """
+    from .merkle import SEGMENT_SIZE, get_segment_roots
+
+    stream = _ZipStream()
+    sha = hashlib.sha256()
+    jumlah = 0
+    pertama = terakhir = None
+
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        with zip_file.open('blockchain_backup.ndjson', 'w', force_zip64=True) as entry:
+            for row in _iter_rows(sejak):
+                line = (json.dumps(row, cls=DjangoJSONEncoder, sort_keys=True) + '\n').encode('utf-8')
+                sha.update(line)
+                entry.write(line)
+                jumlah += 1
+                pertama = pertama or row
+                terakhir = row
+                if jumlah % BACKUP_CHUNK_SIZE == 0:
+                    yield stream.drain()
+
+        zip_file.writestr('merkle_roots.json', json.dumps(
+            {'segment_size': SEGMENT_SIZE, 'segments': get_segment_roots()}, indent=2
+        ))
+        rentang = f"#{pertama['block_index']} – #{terakhir['block_index']}" if jumlah else "-"
+        zip_file.writestr('hash_certificate.txt', (
+            "Blockchain Backup Certificate\n"
+            "---------------------------\n"
+            f"Jenis: {'Inkremental (block > ' + str(sejak) + ')' if sejak else 'Penuh'}\n"
+            f"Blok: {jumlah} ({rentang})\n"
+            f"Previous hash blok pertama: {pertama['previous_hash'] if jumlah else '-'}\n"
+            f"Hash blok terakhir: {terakhir['block_hash'] if jumlah else '-'}\n"
+            f"SHA-256 (blockchain_backup.ndjson): {sha.hexdigest()}\n\n"
+            "Sertifikat ini membuktikan keaslian backup data audit trail CV Borneo Mega Mandiri."
+        ))
+        yield stream.drain()
+    yield stream.drain()
@@ -0,0 +1,132 @@
+"""
+Kebijakan field audit per model & format diff ringkas (v2).
+
+Format lama (v1) menyimpan semua field sebagai string dengan kunci `lama`/`baru`:
+
+    {"data": {...}}                       CREATE
+    {"data_terhapus": {...}}              DELETE
+    {"nama": {"lama": "A", "baru": "B"}}  UPDATE
+
+Format v2 (blok baru) lebih kecil dan kanonik:
+
+    {"v": 2, "d": {...}}                  CREATE
+    {"v": 2, "x": {...}}                  DELETE
+    {"v": 2, "c": {"nama": ["A", "B"]}}   UPDATE
+
+Nilai numerik disimpan apa adanya (int / bool) atau sebagai string desimal
+tanpa nol di belakang; FK disimpan sebagai id kecuali field ada di `teks`.
+Blok v1 tetap diverifikasi dengan serialisasi lamanya (lihat
+blockchain.calculate_block_hash); tampilan memakai normalisasi_changes().
+"""
+import datetime
+import json
+from decimal import Decimal
+
+DIFF_VERSION = 2
+
+# Field yang tidak pernah dicatat
+SELALU_DIKECUALIKAN = {'id', 'created_at', 'updated_at', 'password'}
+
+# Kebijakan per nama model:
+#   include : hanya field ini yang dicatat (opsional)
+#   exclude : field tambahan yang tidak dicatat
+#   teks    : FK yang dicatat sebagai str(objek) (lebih mudah dibaca) alih-alih id
+AUDIT_POLICIES = {
+    'User': {'exclude': {'last_login'}},
+    'Jurnal': {'exclude': {'sumber_model', 'sumber_id', 'sumber_peran'}, 'teks': {'akun_debit', 'akun_kredit'}},
+}
+
+
+def _policy(model):
+    return AUDIT_POLICIES.get(model.__name__, {})
+
+
+def audited_fields(model):
+    """Field konkret yang dicatat untuk model ini sesuai kebijakan."""
+    policy = _policy(model)
+    include = policy.get('include')
+    exclude = SELALU_DIKECUALIKAN | set(policy.get('exclude', ()))
+    return [
+        f for f in model._meta.concrete_fields
+        if f.name not in exclude and (include is None or f.name in include)
+    ]
+
+
+def encode_value(value):
+    """Encoding kanonik satu nilai untuk diff v2."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, Decimal):
+        teks = format(value, 'f')
+        return teks.rstrip('0').rstrip('.') if '.' in teks else teks
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def field_value(instance, field):
+    """Nilai field terenkode: FK → id, kecuali FK di kebijakan `teks` → str(objek)."""
+    if field.is_relation and field.name in _policy(type(instance)).get('teks', ()):
+        obj = getattr(instance, field.name, None)
+        return str(obj) if obj is not None else None
+    return encode_value(getattr(instance, field.attname, None))
+
+
+def changes_create(instance):
+    return {'v': DIFF_VERSION, 'd': _semua_field(instance)}
+
+
+def changes_delete(instance):
+    return {'v': DIFF_VERSION, 'x': _semua_field(instance)}
+
+
+def _semua_field(instance):
+    data = {}
+    for field in audited_fields(type(instance)):
+        val = field_value(instance, field)
+        if val is not None:
+            data[field.name] = val
+    return data
+
+
+def changes_update(instance, old_instance):
+    """Diff v2 instance lama vs baru; None jika tidak ada perubahan nyata."""
+    diff = {}
+    for field in audited_fields(type(instance)):
+        # Bandingkan nilai mentah dulu (FK: id) — objek relasi baru dimuat jika memang berubah
+        if getattr(old_instance, field.attname, None) == getattr(instance, field.attname, None):
+            continue
+        diff[field.name] = [field_value(old_instance, field), field_value(instance, field)]
+    return {'v': DIFF_VERSION, 'c': diff} if diff else None
+
+
+def format_update(perubahan):
+    """Diff v2 dari {field: (lama, baru)} — untuk catat_audit() manual."""
+    return {'v': DIFF_VERSION, 'c': {k: [encode_value(a), encode_value(b)] for k, (a, b) in perubahan.items()}}
+
+
+def canonical_changes(changes):
+    """
+    Serialisasi `changes` untuk input hash blok.
+    v1 memakai serialisasi lama (agar blok lama tetap valid), v2 versi ringkas.
+    """
+    if isinstance(changes, dict) and changes.get('v') == DIFF_VERSION:
+        return json.dumps(changes, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return json.dumps(changes, sort_keys=True)
+
+
+def _teks(value):
+    return '' if value is None else str(value)
+
+
+def normalisasi_changes(changes):
+    """Ubah diff v2 ke bentuk v1 (lama/baru, data, data_terhapus) untuk ditampilkan."""
+    if not isinstance(changes, dict) or changes.get('v') != DIFF_VERSION:
+        return changes
+    if 'c' in changes:
+        return {k: {'lama': _teks(a), 'baru': _teks(b)} for k, (a, b) in changes['c'].items()}
+    if 'd' in changes:
+        return {'data': {k: _teks(v) for k, v in changes['d'].items()}}
+    if 'x' in changes:
+        return {'data_terhapus': {k: _teks(v) for k, v in changes['x'].items()}}
+    return changes
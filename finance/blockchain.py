@@ -1,7 +1,7 @@
 import hashlib
 import hmac
-import json
 from django.conf import settings
+from django.db import transaction
 
 def generate_hash(data_string):
     """Generate SHA-256 hash dari string (dipakai untuk certificate backup)."""
@@ -13,7 +13,10 @@ def calculate_block_hash(audit_log):
     HMAC memastikan hash hanya bisa diverifikasi oleh server yang tahu SECRET_KEY,
     sehingga attacker dengan akses DB tidak bisa merekalkukasi ulang chain.
     """
-    changes_str = json.dumps(audit_log.changes, sort_keys=True)
+    from .audit_policy import canonical_changes
+
+    # v1 (blok lama) memakai serialisasi lama, v2 serialisasi ringkas
+    changes_str = canonical_changes(audit_log.changes)
     time_str = audit_log.timestamp.isoformat() if audit_log.timestamp else ""
     user_id = str(audit_log.user_id) if audit_log.user_id else "None"
 
@@ -29,118 +32,535 @@ def calculate_block_hash(audit_log):
         hashlib.sha256
     ).hexdigest()
 
-def verify_blockchain_integrity():
+# Checkpoint dicatat setiap N blok yang sudah terverifikasi
+CHECKPOINT_INTERVAL = getattr(settings, 'AUDIT_CHECKPOINT_INTERVAL', 1000)
+# Jumlah blok per halaman keyset saat verifikasi (memori konstan berapapun panjang chain)
+VERIFY_CHUNK_SIZE = 2000
+# Kolom yang dibutuhkan calculate_block_hash() + linkage
+HASH_FIELDS = (
+    'id', 'block_index', 'block_hash', 'previous_hash', 'timestamp',
+    'user', 'action', 'model_name', 'object_id', 'changes',
+)
+
+
+def iter_chain_blocks(after_index=0, until_index=None, chunk_size=None, progress=None):
+    """
+    Stream blok AuditLog urut block_index dengan keyset pagination
+    (block_index > terakhir LIMIT chunk_size), bukan satu queryset besar.
+    Hanya satu halaman yang ada di memori sekaligus.
+
+    Args:
+        after_index: mulai dari blok setelah index ini (0 = dari genesis).
+        until_index: berhenti di index ini (None = sampai blok terakhir).
+        chunk_size: blok per halaman (default VERIFY_CHUNK_SIZE).
+        progress: callback(diperiksa, total) dipanggil setiap selesai satu halaman.
+    """
+    from .models import AuditLog
+
+    chunk_size = chunk_size or VERIFY_CHUNK_SIZE
+    qs = AuditLog.objects.only(*HASH_FIELDS).order_by('block_index')
+    if until_index is not None:
+        qs = qs.filter(block_index__lte=until_index)
+    total = qs.filter(block_index__gt=after_index).count() if progress else None
+
+    last_index = after_index
+    diperiksa = 0
+    while True:
+        jumlah = 0
+        for log in qs.filter(block_index__gt=last_index)[:chunk_size].iterator(chunk_size=chunk_size):
+            jumlah += 1
+            last_index = log.block_index
+            yield log
+        diperiksa += jumlah
+        if progress and jumlah:
+            progress(diperiksa, total)
+        if jumlah < chunk_size:
+            return
+
+
+def sign_checkpoint(block_index, block_hash):
+    """HMAC-SHA256 atas (index, hash) checkpoint — tidak bisa dipalsukan tanpa SECRET_KEY."""
+    return hmac.new(
+        settings.SECRET_KEY.encode('utf-8'),
+        f"checkpoint|{block_index}|{block_hash}".encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def get_trusted_checkpoint():
+    """
+    Checkpoint terakhir yang masih bisa dipercaya:
+    - signature HMAC cocok, DAN
+    - block_hash blok pada index tersebut masih sama dengan yang dicatat.
+    Return None jika tidak ada (verifikasi mulai dari genesis).
+    """
+    from .models import AuditCheckpoint, AuditLog
+
+    for cp in AuditCheckpoint.objects.order_by('-block_index').iterator():
+        if not hmac.compare_digest(cp.signature, sign_checkpoint(cp.block_index, cp.block_hash)):
+            continue
+        stored = AuditLog.objects.filter(block_index=cp.block_index).values_list('block_hash', flat=True).first()
+        if stored == cp.block_hash:
+            return cp
+    return None
+
+
+def _save_checkpoints(points):
+    """Simpan checkpoint baru [(index, hash), ...] dari blok yang baru saja lolos verifikasi."""
+    from .models import AuditCheckpoint
+
+    AuditCheckpoint.objects.bulk_create(
+        [AuditCheckpoint(block_index=i, block_hash=h, signature=sign_checkpoint(i, h)) for i, h in points],
+        ignore_conflicts=True,
+    )
+
+
+def verify_blockchain_integrity(deep=False, progress=None):
     """
-    Memeriksa seluruh rantai blok dalam tabel AuditLog dari awal sampai akhir.
+    Memeriksa rantai blok dalam tabel AuditLog.
     Mengembalikan dict status integritas.
 
-    Kompleksitas O(N) — untuk deployment produksi dengan > 50.000 blok,
-    pertimbangkan implementasi periodic checkpointing.
+    Mode inkremental (default): mulai dari checkpoint terpercaya terakhir, jadi
+    hanya blok setelah checkpoint yang di-hash ulang. Mode deep (deep=True):
+    periksa seluruh chain dari genesis — dipakai untuk audit berkala, karena
+    perubahan pada blok sebelum checkpoint hanya terdeteksi di mode ini.
+    Setiap CHECKPOINT_INTERVAL blok yang lolos verifikasi dicatat sebagai checkpoint.
+
+    Blok dibaca streaming per halaman (iter_chain_blocks); `progress` diteruskan
+    ke sana sebagai callback(diperiksa, total).
     """
     from .models import AuditLog
     
-    logs = AuditLog.objects.all().order_by('block_index', 'timestamp')
-    
-    if not logs.exists():
+    total_blocks = AuditLog.objects.count()
+    if not total_blocks:
         return {"is_valid": True, "total_blocks": 0, "message": "No blocks found"}
 
+    checkpoint = None if deep else get_trusted_checkpoint()
     previous_hash = "0" * 64
     expected_index = 1
-    
+    if checkpoint:
+        previous_hash = checkpoint.block_hash
+        expected_index = checkpoint.block_index + 1
+    logs = iter_chain_blocks(after_index=expected_index - 1, progress=progress)
+
+    result = None
+    new_checkpoints = []
     for log in logs:
         # Cek urutan index
         if log.block_index != expected_index:
-            return {
+            result = {
                 "is_valid": False, 
                 "broken_block": log.id,
                 "message": f"Block index mismatch at block {log.block_index}. Expected {expected_index}."
             }
+            break
             
         # Cek linkage
         if log.previous_hash != previous_hash:
-            return {
+            result = {
                 "is_valid": False, 
                 "broken_block": log.id,
                 "message": f"Previous hash mismatch at block {log.block_index}."
             }
+            break
             
         # Cek hash integrity
         calculated_hash = calculate_block_hash(log)
         if log.block_hash != calculated_hash:
-            return {
+            result = {
                 "is_valid": False,
                 "broken_block": log.id,
                 "message": f"Hash integrity failed at block {log.block_index}. Data was tampered."
             }
-            
+            break
+
+        if log.block_index % CHECKPOINT_INTERVAL == 0:
+            new_checkpoints.append((log.block_index, log.block_hash))
         previous_hash = log.block_hash
         expected_index += 1
-        
-    return {
-        "is_valid": True,
-        "total_blocks": logs.count(),
-        "message": "Blockchain is valid and verified."
-    }
 
-def get_tampered_block_ids():
+    _save_checkpoints(new_checkpoints)
+    if result is None:
+        result = {"is_valid": True, "message": "Blockchain is valid and verified."}
+    result.update({
+        "total_blocks": total_blocks,
+        "mode": "deep" if deep else "incremental",
+        "checkpoint": checkpoint.block_index if checkpoint else 0,
+        "verified_blocks": expected_index - 1 - (checkpoint.block_index if checkpoint else 0),
+    })
+    return result
+
+def _scan_tampered(logs, prev_index=0, prev_hash="0" * 64):
+    """
+    Hash ulang setiap blok di `logs` (urut block_index) dan kembalikan
+    {log.id: (block_index, alasan)} untuk blok yang bermasalah.
+    Cukup simpan hash blok sebelumnya — memori tidak tumbuh dengan panjang chain.
+    """
+    tampered = {}
+    for log in logs:
+        # Cek 1: data integrity (apakah block_hash masih valid?)
+        recalculated = calculate_block_hash(log)
+        data_tampered = (log.block_hash != recalculated)
+
+        # Cek 2: chain linkage (apakah previous_hash menunjuk ke blok sebelumnya yang benar?)
+        # Blok sebelumnya hilang (index loncat) → dibandingkan dengan hash genesis
+        expected_prev = prev_hash if prev_index == log.block_index - 1 else "0" * 64
+        chain_broken = (log.previous_hash != expected_prev)
+
+        if data_tampered:
+            tampered[log.id] = (log.block_index, 'data')
+        elif chain_broken:
+            tampered[log.id] = (log.block_index, 'chain')
+
+        prev_index, prev_hash = log.block_index, log.block_hash
+    return tampered
+
+
+def _tampered_after(checkpoint_index=0, progress=None):
+    """Scan semua blok setelah checkpoint_index (0 = dari genesis)."""
+    from .models import AuditCheckpoint
+
+    prev_hash = "0" * 64
+    if checkpoint_index:
+        prev_hash = AuditCheckpoint.objects.get(block_index=checkpoint_index).block_hash
+    logs = iter_chain_blocks(after_index=checkpoint_index, progress=progress)
+    return _scan_tampered(logs, checkpoint_index, prev_hash)
+
+
+def get_tampered_block_ids(deep=False, progress=None):
     """
-    Scan seluruh chain dan kembalikan set berisi ID AuditLog yang terdeteksi manipulasi.
+    Scan chain dan kembalikan set berisi ID AuditLog yang terdeteksi manipulasi.
     Berbeda dengan verify_blockchain_integrity(), fungsi ini TIDAK berhenti di blok pertama —
     ia terus berjalan untuk menemukan SEMUA blok yang bermasalah.
+    Seperti verify_blockchain_integrity(), default mulai dari checkpoint terpercaya;
+    deep=True untuk scan seluruh chain.
 
     Sebuah blok ditandai 'tampered' jika:
     - block_hash tidak cocok dengan hasil kalkulasi ulang (data block diubah langsung di DB), ATAU
     - previous_hash tidak cocok dengan block_hash blok sebelumnya (chain linkage putus).
     """
+    checkpoint = None if deep else get_trusted_checkpoint()
+    return set(_tampered_after(checkpoint.block_index if checkpoint else 0, progress=progress))
+
+
+def verify_block_range(start, end):
+    """
+    Hash ulang blok start..end saja (misal satu halaman explorer) dan perbarui
+    flag AuditTamper di rentang itu. Return {log.id: (block_index, alasan)}.
+    """
+    from .models import AuditLog, AuditTamper, AuditVerifikasi
+
+    prev_index, prev_hash = 0, "0" * 64
+    if start > 1:
+        prev = AuditLog.objects.filter(block_index=start - 1).values_list('block_hash', flat=True).first()
+        if prev is not None:
+            prev_index, prev_hash = start - 1, prev
+    logs = iter_chain_blocks(after_index=start - 1, until_index=end)
+    tampered = _scan_tampered(logs, prev_index, prev_hash)
+
+    with transaction.atomic():
+        AuditTamper.objects.filter(block_index__range=(start, end)).delete()
+        AuditTamper.objects.bulk_create([
+            AuditTamper(log_id=log_id, block_index=index, alasan=alasan)
+            for log_id, (index, alasan) in tampered.items()
+        ])
+        # Ringkasan global ikut dihitung ulang agar badge explorer sesuai flag per blok
+        sebelumnya = AuditVerifikasi.objects.filter(pk=1).first()
+        if tampered:
+            is_valid = False
+            message = f"Manipulasi terdeteksi pada verifikasi rentang #{start}–#{end}."
+        elif sebelumnya is None:
+            is_valid, message = True, f"Rentang #{start}–#{end} valid."
+        else:
+            # Chain dinyatakan rusak hanya karena flag → ikut pulih jika flag habis
+            is_valid = sebelumnya.is_valid or sebelumnya.jumlah_tamper > 0
+            message = sebelumnya.message
+        _simpan_ringkasan_verifikasi(
+            is_valid, sebelumnya.mode if sebelumnya else 'range', message,
+            verified_until=sebelumnya.verified_until if sebelumnya else None,
+        )
+    return tampered
+
+
+def refresh_verification_state(deep=False, progress=None):
+    """
+    Jalankan verifikasi lalu simpan hasilnya (AuditVerifikasi + flag AuditTamper)
+    agar explorer cukup membaca hasil tersimpan.
+
+    Chain valid → cukup satu kali jalan (verify_blockchain_integrity). Jika rusak,
+    scan lanjutan mengumpulkan SEMUA blok bermasalah setelah checkpoint yang sama.
+    Mode inkremental hanya mengganti flag setelah checkpoint; deep mengganti semua.
+    """
+    from django.db.models import Max
     from .models import AuditLog
 
-    logs = AuditLog.objects.all().order_by('block_index', 'timestamp')
-    tampered = set()
-    prev_hash_map = {}  # block_index -> actual stored block_hash
+    last_index = AuditLog.objects.aggregate(m=Max('block_index'))['m'] or 0
+    result = verify_blockchain_integrity(deep=deep, progress=progress)
+    checkpoint_index = result.get('checkpoint', 0)
+    tampered = {} if result['is_valid'] else _tampered_after(checkpoint_index, progress=progress)
 
-    for log in logs:
-        # Cek 1: data integrity (apakah block_hash masih valid?)
-        recalculated = calculate_block_hash(log)
-        data_tampered = (log.block_hash != recalculated)
+    result['tampered_count'] = _simpan_hasil_verifikasi(
+        tampered, checkpoint_index, last_index, result['is_valid'],
+        result.get('mode', 'deep' if deep else 'incremental'), result['message'],
+    )
+    return result
 
-        # Cek 2: chain linkage (apakah previous_hash menunjuk ke blok sebelumnya yang benar?)
-        expected_prev = prev_hash_map.get(log.block_index - 1, "0" * 64)
-        chain_broken = (log.previous_hash != expected_prev)
 
-        if data_tampered or chain_broken:
-            tampered.add(log.id)
+def _simpan_hasil_verifikasi(tampered, after_index, last_index, is_valid, mode, message):
+    """
+    Ganti flag AuditTamper setelah after_index & perbarui AuditVerifikasi.
+    Jika chain valid, segmen Merkle yang sudah penuh ikut disegel. Return jumlah flag.
+    """
+    from .merkle import seal_merkle_segments
+    from .models import AuditTamper
 
-        prev_hash_map[log.block_index] = log.block_hash
+    with transaction.atomic():
+        AuditTamper.objects.filter(block_index__gt=after_index).delete()
+        AuditTamper.objects.bulk_create([
+            AuditTamper(log_id=log_id, block_index=index, alasan=alasan)
+            for log_id, (index, alasan) in tampered.items()
+        ], batch_size=500)
+        jumlah_tamper = _simpan_ringkasan_verifikasi(is_valid, mode, message, verified_until=last_index)
+    if jumlah_tamper == 0 and is_valid:
+        seal_merkle_segments(last_index)
+    return jumlah_tamper
 
-    return tampered
+
+def _simpan_ringkasan_verifikasi(is_valid, mode, message, verified_until=None):
+    """
+    Hitung ulang ringkasan AuditVerifikasi dari flag AuditTamper yang tersimpan.
+    Dipakai verifikasi penuh maupun verifikasi rentang. Return jumlah flag.
+    """
+    from django.utils import timezone
+    from .models import AuditTamper, AuditVerifikasi
+
+    jumlah_tamper = AuditTamper.objects.count()
+    defaults = {
+        'is_valid': jumlah_tamper == 0 and is_valid,
+        'mode': mode,
+        'message': message[:255],
+        'jumlah_tamper': jumlah_tamper,
+        'last_run_at': timezone.now(),
+    }
+    if verified_until is not None:
+        defaults['verified_until'] = verified_until
+    AuditVerifikasi.objects.update_or_create(pk=1, defaults=defaults)
+    return jumlah_tamper
+
+
+# ============================================================
+# VERIFIKASI PARALEL (multi-proses per rentang block_index)
+# ============================================================
+
+def _init_verify_worker():
+    """Initializer proses worker: pastikan Django siap (start method spawn/forkserver)."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _verify_range_worker(bounds):
+    """
+    Hash ulang blok start..end di proses worker. Linkage dicek di dalam rentang;
+    previous_hash blok pertama dikembalikan agar dicek proses induk di batas rentang.
+    """
+    start, end = bounds
+    tampered = {}
+    checkpoints = []
+    first = None
+    prev_index = prev_hash = None
+    jumlah = 0
+    for log in iter_chain_blocks(after_index=start - 1, until_index=end):
+        jumlah += 1
+        if log.block_hash != calculate_block_hash(log):
+            tampered[log.id] = (log.block_index, 'data')
+        elif first is not None and (prev_index != log.block_index - 1 or log.previous_hash != prev_hash):
+            tampered[log.id] = (log.block_index, 'chain')
+        elif log.block_index % CHECKPOINT_INTERVAL == 0:
+            checkpoints.append((log.block_index, log.block_hash))
+        if first is None:
+            first = (log.id, log.block_index, log.previous_hash)
+        prev_index, prev_hash = log.block_index, log.block_hash
+    return {
+        'bounds': bounds, 'jumlah': jumlah, 'tampered': tampered, 'checkpoints': checkpoints,
+        'first': first, 'last': (prev_index, prev_hash) if jumlah else None,
+    }
+
+
+def _split_ranges(first_index, last_index, parts, min_size=VERIFY_CHUNK_SIZE):
+    """Bagi first..last menjadi rentang block_index yang kira-kira sama besar."""
+    size = max(min_size, -(-(last_index - first_index + 1) // parts))
+    return [(i, min(i + size - 1, last_index)) for i in range(first_index, last_index + 1, size)]
+
+
+def verify_blockchain_parallel(workers=None, progress=None):
+    """
+    Deep verify seluruh chain secara paralel: chain dibagi per rentang block_index,
+    tiap rentang di-hash ulang di process pool, lalu linkage antar rentang dicek
+    di sini (previous_hash blok pertama rentang vs block_hash blok terakhir rentang
+    sebelumnya). Hasil disimpan seperti refresh_verification_state(deep=True).
+
+    workers=1 berjalan di proses ini (tanpa pool) — dipakai test/SQLite in-memory.
+    """
+    import os
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    from django.db import connections
+    from django.db.models import Max, Min
+    from .models import AuditLog
+
+    mulai = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    bounds = AuditLog.objects.filter(block_index__gt=0).aggregate(first=Min('block_index'), last=Max('block_index'))
+    if bounds['last'] is None:
+        return {"is_valid": True, "total_blocks": 0, "message": "No blocks found", "tampered_count": 0}
+
+    ranges = _split_ranges(bounds['first'], bounds['last'], workers * 4)
+    total = AuditLog.objects.filter(block_index__gt=0).count()
+    hasil = []
+    if workers == 1 or len(ranges) == 1:
+        for r in ranges:
+            hasil.append(_verify_range_worker(r))
+            if progress:
+                progress(sum(h['jumlah'] for h in hasil), total)
+    else:
+        # Koneksi DB induk tidak boleh dipakai bersama proses anak → tutup dulu,
+        # tiap worker membuka koneksinya sendiri
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_verify_worker) as pool:
+            for h in pool.map(_verify_range_worker, ranges):
+                hasil.append(h)
+                if progress:
+                    progress(sum(x['jumlah'] for x in hasil), total)
+
+    # Linkage di batas rentang (urut block_index)
+    tampered = {}
+    checkpoints = []
+    prev_last = (0, "0" * 64)
+    for h in hasil:
+        tampered.update(h['tampered'])
+        checkpoints.extend(h['checkpoints'])
+        if h['first']:
+            log_id, index, previous_hash = h['first']
+            expected = prev_last[1] if prev_last[0] == index - 1 else "0" * 64
+            if previous_hash != expected and log_id not in tampered:
+                tampered[log_id] = (index, 'chain')
+        if h['last']:
+            prev_last = h['last']
+
+    # Checkpoint hanya sah jika seluruh chain sebelumnya valid
+    batas = min((index for index, _ in tampered.values()), default=None)
+    _save_checkpoints([cp for cp in checkpoints if batas is None or cp[0] < batas])
+
+    is_valid = not tampered and bounds['first'] == 1 and total == bounds['last']
+    message = ("Blockchain is valid and verified." if is_valid
+               else f"{len(tampered)} tampered block(s) detected." if tampered
+               else "Block index sequence is not contiguous.")
+    tampered_count = _simpan_hasil_verifikasi(tampered, 0, bounds['last'], is_valid, 'parallel', message)
+    return {
+        "is_valid": is_valid,
+        "total_blocks": total,
+        "message": message,
+        "mode": "parallel",
+        "checkpoint": 0,
+        "verified_blocks": total,
+        "workers": workers,
+        "ranges": len(ranges),
+        "tampered_count": tampered_count,
+        "elapsed_s": round(time.perf_counter() - mulai, 3),
+    }
+
+
+def _tabel_ada(model):
+    from django.db import connection
+    return model._meta.db_table in connection.introspection.table_names()
+
+
+def rechain_audit_logs(chunk_size=2000, progress=None):
+    """
+    Susun ulang hash chain seluruh AuditLog (urut timestamp, id) secara
+    bertahap dan bisa dilanjutkan (resumable).
+
+    1. Run baru: semua block_index diparkir ke -id (satu UPDATE) sehingga
+       penomoran ulang tidak bentrok dengan constraint unik, lalu data turunan
+       (checkpoint, Merkle root, flag tamper) dihapus dan chain head di-reset.
+    2. Per chunk (satu transaksi): ambil blok terparkir berikutnya, hitung
+       index & hash di memori, tulis dengan satu executemany UPDATE ... WHERE id,
+       majukan chain head. (bulk_update dengan CASE WHEN per kolom ±60x lebih
+       lambat di SQLite untuk 3 kolom × ribuan baris.)
+
+    Progres tersimpan di data itu sendiri: blok dengan block_index > 0 sudah
+    selesai, <= 0 belum. Jika terputus, panggil lagi → lanjut dari blok
+    positif terakhir. Chain head dikunci per chunk sehingga audit baru yang
+    masuk selama proses tetap tersambung ke ujung chain.
+
+    Returns:
+        dict {'diproses', 'total', 'dilanjutkan'}
+    """
+    from django.db import connection
+    from django.db.models import F
+    from .models import (
+        AuditLog, AuditChainHead, AuditCheckpoint, AuditMerkleSegment, AuditTamper, AuditVerifikasi,
+    )
+
+    sql_update = (
+        f"UPDATE {connection.ops.quote_name(AuditLog._meta.db_table)} "
+        "SET block_index = %s, previous_hash = %s, block_hash = %s WHERE id = %s"
+    )
+    ada_head = _tabel_ada(AuditChainHead)
+    terparkir = AuditLog.objects.filter(block_index__lte=0)
+    dilanjutkan = terparkir.exists()
+    if not dilanjutkan:
+        with transaction.atomic():
+            # Hash semua blok berubah → data turunan lama tidak berlaku lagi
+            for model in (AuditCheckpoint, AuditMerkleSegment, AuditTamper, AuditVerifikasi):
+                if _tabel_ada(model):
+                    model.objects.all().delete()
+            AuditLog.objects.update(block_index=-F('id'))
+            if ada_head:
+                AuditChainHead.objects.update_or_create(pk=1, defaults={'block_index': 0, 'block_hash': "0" * 64})
+
+    total = terparkir.count()
+    diproses = 0
+    while True:
+        with transaction.atomic():
+            head = AuditChainHead.objects.select_for_update().filter(pk=1).first() if ada_head else None
+            last = (AuditLog.objects.filter(block_index__gt=0).order_by('-block_index')
+                    .values_list('block_index', 'block_hash').first())
+            block_index, previous_hash = last if last else (0, "0" * 64)
+
+            chunk = list(terparkir.order_by('timestamp', 'id').only(*HASH_FIELDS)[:chunk_size])
+            if not chunk:
+                break
+            for log in chunk:
+                block_index += 1
+                log.block_index = block_index
+                log.previous_hash = previous_hash
+                log.block_hash = calculate_block_hash(log)
+                previous_hash = log.block_hash
+            with connection.cursor() as cursor:
+                cursor.executemany(sql_update, [
+                    (log.block_index, log.previous_hash, log.block_hash, log.pk) for log in chunk
+                ])
+
+            if head:
+                head.block_index, head.block_hash = block_index, previous_hash
+                head.save(update_fields=['block_index', 'block_hash', 'updated_at'])
+            elif ada_head:
+                AuditChainHead.objects.create(pk=1, block_index=block_index, block_hash=previous_hash)
+
+        diproses += len(chunk)
+        if progress:
+            progress(diproses, total)
+
+    return {'diproses': diproses, 'total': total, 'dilanjutkan': dilanjutkan}
 
 
 def migrate_existing_logs_to_blockchain():
     """
     Fungsi utilitas untuk dijalankan sekali guna mengonversi
     AuditLog lama yang belum punya block_hash menjadi format Blockchain.
+    Lihat rechain_audit_logs() / command rechain_audit_log.
     """
-    from .models import AuditLog
-    
-    logs = AuditLog.objects.all().order_by('timestamp')
-    
-    previous_hash = "0" * 64
-    block_index = 1
-    
-    for log in logs:
-        log.block_index = block_index
-        log.previous_hash = previous_hash
-        
-        # Calculate new hash
-        new_hash = calculate_block_hash(log)
-        log.block_hash = new_hash
-        
-        # Simpan tanpa men-trigger signal tambahan
-        AuditLog.objects.filter(pk=log.pk).update(
-            block_index=block_index,
-            previous_hash=previous_hash,
-            block_hash=new_hash
-        )
-        
-        previous_hash = new_hash
-        block_index += 1
+    return rechain_audit_logs()
@@ -0,0 +1,101 @@
+"""
+Cache ringkasan dashboard Owner (total aset, pendapatan, beban, laba, tren 6 bulan).
+
+Dua lapis cache:
+1. Per-proses (dict di memori) — paling cepat, tanpa serialisasi.
+2. Shared (Django cache framework sesuai settings.CACHES, default file-based).
+
+Invalidasi memakai "versi" yang disimpan di shared cache. Setiap post_save /
+post_delete pada Jurnal atau Akun mengganti versi (setelah transaksi commit),
+sehingga semua entri lama otomatis tidak terpakai lagi — di semua proses HANYA
+jika backend cache memang dibagi antar worker (bukan LocMemCache; lihat check
+finance.W001).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Akun, Jurnal
+
+VERSI_KEY = 'dashboard:ringkasan:versi'
+CACHE_TIMEOUT = 60 * 60  # 1 jam — hanya batas atas, invalidasi utama lewat signal
+
+_cache_lokal = {}  # {periode: (versi, data)}
+_lock = threading.Lock()
+_statistik = {'hit_lokal': 0, 'hit_shared': 0, 'miss': 0, 'invalidasi': 0}
+
+
+def _versi_sekarang():
+    """Ambil versi cache aktif; buat baru jika belum ada (atau ter-evict)."""
+    versi = cache.get(VERSI_KEY)
+    if versi is None:
+        cache.add(VERSI_KEY, time.time_ns(), None)
+        versi = cache.get(VERSI_KEY)
+    return versi
+
+
+def _catat(jenis):
+    with _lock:
+        _statistik[jenis] += 1
+
+
+def get_ringkasan_dashboard(periode, hitung):
+    """
+    Ambil ringkasan dashboard untuk `periode` (mis. '2026-10') dari cache,
+    atau jalankan `hitung()` lalu simpan hasilnya jika belum ada.
+    """
+    versi = _versi_sekarang()
+
+    with _lock:
+        lokal = _cache_lokal.get(periode)
+    if lokal and lokal[0] == versi:
+        _catat('hit_lokal')
+        return lokal[1]
+
+    shared_key = f'dashboard:ringkasan:{periode}:{versi}'
+    data = cache.get(shared_key)
+    if data is not None:
+        _catat('hit_shared')
+    else:
+        _catat('miss')
+        data = hitung()
+        cache.set(shared_key, data, CACHE_TIMEOUT)
+
+    with _lock:
+        _cache_lokal[periode] = (versi, data)
+    return data
+
+
+def invalidate_ringkasan_dashboard():
+    """Buang seluruh cache ringkasan dashboard (semua periode; proses lain lewat versi di shared cache)."""
+    cache.set(VERSI_KEY, time.time_ns(), None)
+    with _lock:
+        _cache_lokal.clear()
+    _catat('invalidasi')
+
+
+def get_statistik_cache():
+    """Return counter hit/miss cache ringkasan dashboard untuk proses ini."""
+    with _lock:
+        data = dict(_statistik)
+    total = data['hit_lokal'] + data['hit_shared'] + data['miss']
+    data['hit_ratio'] = round((data['hit_lokal'] + data['hit_shared']) / total, 4) if total else 0.0
+    return data
+
+
+@receiver(post_save, sender=Jurnal)
+@receiver(post_delete, sender=Jurnal)
+@receiver(post_save, sender=Akun)
+@receiver(post_delete, sender=Akun)
+def invalidate_dashboard_on_change(sender, **kwargs):
+    """
+    Jurnal/Akun berubah → invalidasi sekarang (proses ini langsung melihat data baru)
+    dan sekali lagi setelah commit, agar ringkasan yang sempat di-cache proses lain
+    selama transaksi berjalan (masih data lama) ikut terbuang.
+    """
+    invalidate_ringkasan_dashboard()
+    transaction.on_commit(invalidate_ringkasan_dashboard)
@@ -309,3 +309,13 @@ class OpsOutboundForm(forms.ModelForm):
         self.fields['inbound'].queryset = OpsInbound.objects.filter(
             status__in=['SIAP_KIRIM', 'PROSES', 'DITERIMA']
         ).exclude(id__in=used_inbound_ids)
+
+
+from .importer import JENIS_CHOICES
+
+
+class ImportCSVForm(forms.Form):
+    """Upload CSV operasional untuk import massal (lihat finance.importer)."""
+    jenis = forms.ChoiceField(choices=JENIS_CHOICES, label='Jenis Data')
+    file = forms.FileField(label='File CSV', widget=forms.ClearableFileInput(attrs={'accept': '.csv'}))
+    dry_run = forms.BooleanField(required=False, label='Validasi saja (tidak menyimpan)')
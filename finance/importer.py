@@ -0,0 +1,429 @@
+"""
+Import massal data operasional (Inbound / Outbound / Manifest) dari file CSV.
+
+Alur per file:
+1. CSV dibaca baris per baris (streaming, tidak dimuat utuh ke memori).
+2. Baris dikumpulkan per chunk lalu divalidasi: parsing tanggal & angka,
+   kolom wajib, validasi model (full_clean — bulk_create melewati save()),
+   duplikat di file, dan duplikat di database (1 query per chunk).
+3. Setiap chunk disimpan dalam SATU transaksi:
+   - bulk_create data operasional,
+   - bulk_create Jurnal otomatis (aturan akun sama dengan signal di models.py),
+   - update SaldoBulanan per (akun, bulan) — bukan per baris,
+   - blok audit log ditambahkan ke hash chain sekaligus.
+
+bulk_create tidak memicu signal, jadi semua efek samping signal auto-jurnal
+dikerjakan di sini secara batch.
+"""
+import codecs
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .akun_lookup import get_akun
+from .models import InboundTransaction, OutboundTransaction, Manifest, Jurnal, SaldoBulanan
+
+CHUNK_SIZE = 1000
+
+# UTF-8 dulu; file hasil "Save as CSV" Excel Windows biasanya cp1252
+ENCODING_FILE = ('utf-8-sig', 'cp1252')
+
+FORMAT_TANGGAL = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%b-%y', '%d %B %Y')
+
+
+class BarisTidakValid(ValueError):
+    """Baris CSV tidak valid (pesan ditampilkan ke user)."""
+
+
+class FileTidakValid(ValueError):
+    """File CSV tidak bisa dibaca sama sekali (pesan ditampilkan ke user)."""
+
+
+# ============================================================
+# PARSER NILAI
+# ============================================================
+
+def _teks(value):
+    value = (value or '').strip()
+    return value or None
+
+
+def _tanggal(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    for fmt in FORMAT_TANGGAL:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise BarisTidakValid(f"format tanggal tidak dikenali: '{value}'")
+
+
+def _rupiah(value):
+    """'Rp 1.500.000' / '1500000' / '1,500,000' → Decimal('1500000')."""
+    value = (value or '').strip()
+    if not value or value == '-':
+        return Decimal('0')
+    # Buang sen (",00" / ".00") lalu semua pemisah ribuan & prefix "Rp"
+    angka = re.sub(r'[^\d\-]', '', re.sub(r'[,.]\d{2}$', '', value))
+    try:
+        return Decimal(angka or '0')
+    except InvalidOperation:
+        raise BarisTidakValid(f"nominal tidak valid: '{value}'")
+
+
+def _desimal(value):
+    """Angka desimal (kg): '10,5' atau '10.5'."""
+    value = (value or '').strip().replace(',', '.')
+    if not value or value == '-':
+        return Decimal('0')
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise BarisTidakValid(f"angka tidak valid: '{value}'")
+
+
+def _bulat(value):
+    """Bilangan bulat (koli): '12' → 12. Kosong / '-' = 0, selain angka bulat ditolak."""
+    value = (value or '').strip()
+    if not value or value == '-':
+        return 0
+    if not re.fullmatch(r'-?\d+', value):
+        raise BarisTidakValid(f"bilangan bulat tidak valid: '{value}'")
+    return int(value)
+
+
+def _normal_header(header):
+    """'No. Resi BMM' → 'no_resi_bmm'."""
+    return re.sub(r'[^a-z0-9]+', '_', (header or '').strip().lower()).strip('_')
+
+
+# ============================================================
+# DEFINISI KOLOM PER JENIS
+# field: (parser, [alias header CSV yang sudah dinormalisasi])
+# ============================================================
+
+KOLOM = {
+    'inbound': {
+        'model': InboundTransaction,
+        'kunci': ('no_resi',),
+        'fields': {
+            'tanggal_stt': (_tanggal, ['tanggal_stt', 'tgl_stt']),
+            'tanggal_masuk_stt': (_tanggal, ['tanggal_masuk_stt', 'tgl_masuk_stt', 'tanggal_masuk', 'tanggal']),
+            'vendor': (_teks, ['vendor']),
+            'no_resi': (_teks, ['no_resi', 'resi', 'nomor_resi', 'no_stt']),
+            'tujuan': (_teks, ['tujuan']),
+            'koli': (_bulat, ['koli']),
+            'kilo': (_desimal, ['kilo', 'kg', 'berat']),
+            'tanggal_dooring': (_tanggal, ['tanggal_dooring', 'tgl_dooring']),
+            'tanggal_kembali': (_tanggal, ['tanggal_kembali', 'tgl_kembali']),
+            'keterangan': (_teks, ['keterangan', 'ket']),
+            'tarif_per_kg': (_teks, ['tarif_per_kg', 'tarif_kg', 'tarif']),
+            'total_biaya': (_rupiah, ['total_biaya', 'total', 'jumlah']),
+        },
+    },
+    'outbound': {
+        'model': OutboundTransaction,
+        'kunci': ('no_resi_bmm',),
+        'fields': {
+            'tanggal': (_tanggal, ['tanggal', 'tgl']),
+            'pengirim': (_teks, ['pengirim']),
+            'penerima': (_teks, ['penerima']),
+            'no_hp': (_teks, ['no_hp', 'hp', 'telepon']),
+            'no_resi_bmm': (_teks, ['no_resi_bmm', 'resi_bmm', 'no_resi', 'resi']),
+            'koli': (_bulat, ['koli']),
+            'kg': (_teks, ['kg', 'kilo', 'berat']),
+            'tarif': (_teks, ['tarif']),
+            'total': (_rupiah, ['total', 'jumlah']),
+            'vendor1_tgl': (_tanggal, ['vendor1_tgl', 'tgl_vendor_1', 'tgl_vendor1']),
+            'vendor1_resi': (_teks, ['vendor1_resi', 'resi_vendor_1', 'resi_vendor1']),
+            'vendor1_biaya': (_rupiah, ['vendor1_biaya', 'biaya_vendor_1', 'biaya_vendor1']),
+            'vendor2_tgl': (_tanggal, ['vendor2_tgl', 'tgl_vendor_2', 'tgl_vendor2']),
+            'vendor2_resi': (_teks, ['vendor2_resi', 'resi_vendor_2', 'resi_vendor2']),
+            'vendor2_biaya': (_rupiah, ['vendor2_biaya', 'biaya_vendor_2', 'biaya_vendor2']),
+            'keterangan': (_teks, ['keterangan', 'ket']),
+            'status': (_teks, ['status']),
+            'tgl_bayar': (_tanggal, ['tgl_bayar', 'tanggal_bayar']),
+            'nama_bayar': (_teks, ['nama_bayar']),
+            'profit': (_rupiah, ['profit']),
+        },
+    },
+    'manifest': {
+        'model': Manifest,
+        'kunci': ('no_resi', 'kategori'),
+        'fields': {
+            'kategori': (_teks, ['kategori']),
+            'tanggal_kirim': (_tanggal, ['tanggal_kirim', 'tgl_kirim', 'tanggal']),
+            'no_resi': (_teks, ['no_resi', 'resi', 'nomor_resi']),
+            'pengirim': (_teks, ['pengirim']),
+            'tujuan': (_teks, ['tujuan']),
+            'koli': (_bulat, ['koli']),
+            'kg': (_desimal, ['kg', 'kilo', 'berat']),
+            'penerima': (_teks, ['penerima']),
+            'tanggal_terima': (_tanggal, ['tanggal_terima', 'tgl_terima']),
+            'dp': (_rupiah, ['dp']),
+            'tarif': (_rupiah, ['tarif']),
+            'total': (_rupiah, ['total', 'jumlah']),
+        },
+    },
+}
+
+JENIS_CHOICES = [('inbound', 'Inbound'), ('outbound', 'Outbound'), ('manifest', 'Manifest')]
+
+
+# ============================================================
+# PEMBACAAN CSV (STREAMING)
+# ============================================================
+
+def _buka_teks(stream):
+    """
+    Bungkus stream biner menjadi teks dengan encoding pertama di ENCODING_FILE
+    yang bisa men-decode seluruh isi file. File dicek per blok (memori tetap
+    datar) lalu di-seek ke awal, sehingga tidak ada batch yang sudah tersimpan
+    sebelum ketahuan file tidak bisa dibaca.
+    """
+    if not stream.seekable():
+        return io.TextIOWrapper(stream, encoding=ENCODING_FILE[0], newline='')
+    awal = stream.tell()
+    for encoding in ENCODING_FILE:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        stream.seek(awal)
+        try:
+            for blok in iter(lambda: stream.read(64 * 1024), b''):
+                decoder.decode(blok)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            continue
+        stream.seek(awal)
+        return io.TextIOWrapper(stream, encoding=encoding, newline='')
+    raise FileTidakValid('file bukan teks CSV (encoding tidak dikenali, simpan ulang sebagai CSV UTF-8)')
+
+
+def _baca_csv(stream):
+    """
+    Generator (nomor_baris, dict) dari stream teks CSV.
+    Delimiter ',' atau ';' dideteksi dari baris header.
+    """
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    fieldnames = [_normal_header(h) for h in next(csv.reader([header], delimiter=delimiter), [])]
+    reader = csv.DictReader(stream, fieldnames=fieldnames, delimiter=delimiter)
+    for nomor, row in enumerate(reader, start=2):
+        if any((v or '').strip() for v in row.values() if isinstance(v, str)):
+            yield nomor, row
+
+
+def _peta_kolom(spec, fieldnames):
+    """{field_model: header_csv} untuk header yang tersedia."""
+    peta = {}
+    for field, (_, aliases) in spec['fields'].items():
+        for alias in aliases:
+            if alias in fieldnames:
+                peta[field] = alias
+                break
+    return peta
+
+
+def _chunks(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ============================================================
+# JURNAL OTOMATIS (BATCH) — aturan sama dengan signal di models.py
+# ============================================================
+
+def _jurnal_untuk(jenis, obj):
+    """List Jurnal (belum tersimpan) untuk satu objek hasil import."""
+    if jenis == 'inbound':
+        akun_piutang = get_akun('piutang_usaha')
+        akun_pendapatan = get_akun('pendapatan_inbound')
+        if obj.total_biaya <= 0 or not akun_piutang or not akun_pendapatan:
+            return []
+        return [Jurnal(
+            tanggal=obj.tanggal_masuk_stt or obj.created_at.date(),
+            uraian=f"Invoice Inbound: {obj.no_resi} - {obj.vendor}",
+            akun_debit=akun_piutang, akun_kredit=akun_pendapatan, nominal=obj.total_biaya,
+            sumber_model='inbound', sumber_id=obj.pk, sumber_peran='invoice',
+        )]
+
+    if jenis == 'manifest':
+        tanggal = obj.tanggal_kirim or obj.created_at.date()
+        hasil = []
+        akun_hutang = get_akun('hutang_vendor')
+        akun_beban = get_akun('beban_pengiriman')
+        if obj.total > 0 and not akun_beban:
+            # Signal berhenti di sini: hutang maupun DP tidak dijurnal
+            return hasil
+        if obj.total > 0 and akun_hutang:
+            hasil.append(Jurnal(
+                tanggal=tanggal, uraian=f"Hutang Manifest: {obj.kategori} - {obj.no_resi}",
+                akun_debit=akun_beban, akun_kredit=akun_hutang, nominal=obj.total,
+                sumber_model='manifest', sumber_id=obj.pk, sumber_peran='hutang',
+            ))
+        akun_debit_dp = get_akun('beban_dp_manifest')
+        akun_kas = get_akun('kas')
+        if obj.dp > 0 and akun_debit_dp and akun_kas:
+            hasil.append(Jurnal(
+                tanggal=tanggal, uraian=f"DP Manifest: {obj.kategori} - {obj.no_resi}",
+                akun_debit=akun_debit_dp, akun_kredit=akun_kas, nominal=obj.dp,
+                sumber_model='manifest', sumber_id=obj.pk, sumber_peran='dp',
+            ))
+        return hasil
+
+    return []  # Outbound tidak punya jurnal otomatis
+
+
+def _terapkan_saldo_bulanan(jurnal_list):
+    """Update SaldoBulanan sekali per (debit, kredit, bulan), bukan per jurnal."""
+    delta = {}
+    for j in jurnal_list:
+        key = (j.akun_debit_id, j.akun_kredit_id, j.tanggal.year, j.tanggal.month)
+        delta[key] = delta.get(key, Decimal('0')) + j.nominal
+    for (debit_id, kredit_id, tahun, bulan), nominal in delta.items():
+        SaldoBulanan.terapkan(debit_id, kredit_id, date(tahun, bulan, 1), nominal)
+
+
+# ============================================================
+# IMPORT
+# ============================================================
+
+def _validasi_chunk(jenis, spec, peta, rows, kunci_terlihat, hasil):
+    """Parsing + validasi satu chunk. Return list objek model yang siap disimpan."""
+    model = spec['model']
+    kandidat = []
+    for nomor, row in rows:
+        try:
+            data = {field: spec['fields'][field][0](row.get(header)) for field, header in peta.items()}
+            if jenis == 'manifest':
+                data['kategori'] = (data.get('kategori') or 'HULU').upper()
+                valid = dict(Manifest.KATEGORI_CHOICES)
+                if data['kategori'] not in valid:
+                    raise BarisTidakValid(f"kategori '{data['kategori']}' tidak dikenal")
+            kunci = tuple(data.get(k) for k in spec['kunci'])
+            if not kunci[0]:
+                raise BarisTidakValid(f"kolom {spec['kunci'][0]} wajib diisi")
+            if kunci in kunci_terlihat:
+                raise BarisTidakValid(f"duplikat di file ({', '.join(map(str, kunci))})")
+            obj = model(**data)
+            # Unik dicek per chunk di bawah (1 query), bukan per baris
+            obj.full_clean(validate_unique=False)
+        except ValidationError as e:
+            hasil['errors'].append((nomor, '; '.join(f"{field}: {' '.join(pesan)}" for field, pesan in e.message_dict.items())))
+            continue
+        except BarisTidakValid as e:
+            hasil['errors'].append((nomor, str(e)))
+            continue
+        kunci_terlihat.add(kunci)
+        kandidat.append((nomor, kunci, obj))
+
+    if not kandidat:
+        return []
+
+    # Duplikat di database: 1 query per chunk
+    utama = spec['kunci'][0]
+    sudah_ada = set(
+        model.objects.filter(**{f'{utama}__in': [k[0] for _, k, _ in kandidat]})
+        .values_list(*spec['kunci'])
+    )
+    objs = []
+    for nomor, kunci, obj in kandidat:
+        if kunci in sudah_ada:
+            hasil['dilewati'] += 1
+            hasil['errors'].append((nomor, f"sudah ada di database ({', '.join(map(str, kunci))})"))
+        else:
+            objs.append(obj)
+    return objs
+
+
+def _simpan_chunk(jenis, objs):
+    """Simpan satu chunk + jurnal + saldo bulanan + audit log dalam satu transaksi."""
+    from .signals import audit_bulk_create
+
+    model = KOLOM[jenis]['model']
+    with transaction.atomic():
+        objs = model.objects.bulk_create(objs)
+        jurnal_list = [j for obj in objs for j in _jurnal_untuk(jenis, obj)]
+        if jurnal_list:
+            jurnal_list = Jurnal.objects.bulk_create(jurnal_list)
+            _terapkan_saldo_bulanan(jurnal_list)
+        audit_bulk_create(list(objs) + jurnal_list)
+    return len(objs), len(jurnal_list)
+
+
+def import_csv(stream, jenis, chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Import CSV operasional.
+
+    Args:
+        stream: file teks (sudah di-decode) atau file biner (encoding UTF-8,
+            fallback cp1252 — lihat _buka_teks).
+        jenis: 'inbound' | 'outbound' | 'manifest'.
+        dry_run: hanya validasi, tidak menyimpan apa pun.
+        progress: callable(hasil) dipanggil setiap selesai satu chunk.
+
+    Returns:
+        dict {'dibuat', 'jurnal', 'dilewati', 'errors': [(nomor_baris, pesan)]}
+
+    Raises:
+        FileTidakValid: file tidak bisa di-decode sebagai teks.
+    """
+    if jenis not in KOLOM:
+        raise ValueError(f"Jenis import tidak dikenal: {jenis}")
+    if not isinstance(stream, io.TextIOBase):
+        stream = _buka_teks(stream)
+    try:
+        return _import_stream(stream, jenis, chunk_size, dry_run, progress)
+    except UnicodeDecodeError as e:
+        # Hanya mungkin untuk stream yang tidak bisa di-seek (tidak dicek di depan)
+        raise FileTidakValid(f'file bukan teks UTF-8 (posisi byte {e.start})') from e
+
+
+def _import_stream(stream, jenis, chunk_size, dry_run, progress):
+    """Isi import_csv() untuk stream teks yang sudah dibuka."""
+    spec = KOLOM[jenis]
+    hasil = {'dibuat': 0, 'jurnal': 0, 'dilewati': 0, 'errors': []}
+    baris = _baca_csv(stream)
+
+    pertama = next(baris, None)
+    if pertama is None:
+        return hasil
+    peta = _peta_kolom(spec, pertama[1].keys())
+    if spec['kunci'][0] not in peta:
+        hasil['errors'].append((1, f"kolom wajib '{spec['kunci'][0]}' tidak ditemukan di header"))
+        return hasil
+
+    def semua_baris():
+        yield pertama
+        yield from baris
+
+    kunci_terlihat = set()
+    ada_data_baru = False
+    for rows in _chunks(semua_baris(), chunk_size):
+        objs = _validasi_chunk(jenis, spec, peta, rows, kunci_terlihat, hasil)
+        if objs and not dry_run:
+            dibuat, jurnal = _simpan_chunk(jenis, objs)
+            hasil['dibuat'] += dibuat
+            hasil['jurnal'] += jurnal
+            ada_data_baru = True
+        elif dry_run:
+            hasil['dibuat'] += len(objs)
+        if progress:
+            progress(hasil)
+
+    if ada_data_baru:
+        from .dashboard_cache import invalidate_ringkasan_dashboard
+        transaction.on_commit(invalidate_ringkasan_dashboard)
+    return hasil
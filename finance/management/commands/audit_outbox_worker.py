@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Worker mode AUDIT_ASYNC: pindahkan event dari AuditOutbox ke hash chain AuditLog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Kosongkan outbox sekali lalu berhenti (untuk cron)',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Jeda (detik) saat outbox kosong (default: 1)',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=500,
+            help='Jumlah event per transaksi (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        from finance.signals import drain_audit_outbox
+
+        if options['once']:
+            total = drain_audit_outbox(batch_size=options['batch'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} event audit masuk ke chain.'))
+            return
+
+        # Jalankan SATU worker saja agar urutan blok sama dengan urutan outbox
+        self.stdout.write('🔗 Audit outbox worker berjalan (Ctrl+C untuk berhenti)...')
+        try:
+            while True:
+                total = drain_audit_outbox(batch_size=options['batch'])
+                if total:
+                    self.stdout.write(f'   ... {total} event audit masuk ke chain')
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('✅ Worker dihentikan.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Backup blockchain AuditLog ke file ZIP (streaming NDJSON), penuh atau inkremental'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sejak', type=int, default=0,
+            help='Hanya blok setelah block_index ini (backup inkremental, default: penuh)',
+        )
+        parser.add_argument(
+            '--output', default='',
+            help='Path file ZIP tujuan (default: nama otomatis di folder saat ini)',
+        )
+
+    def handle(self, *args, **options):
+        from finance.audit_backup import backup_filename, iter_backup_zip
+
+        path = options['output'] or backup_filename(options['sejak'])
+        try:
+            f = open(path, 'wb')
+        except OSError as e:
+            raise CommandError(f'File tidak bisa ditulis: {e}')
+
+        self.stdout.write(f'💾 Backup blockchain ke {path}...')
+        with f:
+            for potongan in iter_backup_zip(options['sejak']):
+                f.write(potongan)
+        self.stdout.write(self.style.SUCCESS(f'✅ Backup selesai: {path}'))
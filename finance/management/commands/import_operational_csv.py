@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Import massal CSV Inbound / Outbound / Manifest (bulk insert + jurnal & audit log per batch)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path file CSV')
+        parser.add_argument(
+            '--jenis', required=True, choices=['inbound', 'outbound', 'manifest'],
+            help='Jenis data di file CSV',
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=1000,
+            help='Jumlah baris per batch/transaksi (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Hanya validasi, tidak menyimpan data',
+        )
+
+    def handle(self, *args, **options):
+        from finance.importer import FileTidakValid, import_csv
+
+        try:
+            f = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(f'File tidak bisa dibuka: {e}')
+
+        def progress(hasil):
+            self.stdout.write(f"   ... {hasil['dibuat']} baris diproses", ending='\r')
+
+        self.stdout.write(f"📥 Import {options['jenis']} dari {options['path']}")
+        with f:
+            try:
+                hasil = import_csv(
+                    f, options['jenis'], chunk_size=options['chunk'],
+                    dry_run=options['dry_run'], progress=progress,
+                )
+            except FileTidakValid as e:
+                raise CommandError(f'File tidak bisa dibaca: {e}')
+
+        self.stdout.write('')
+        label = 'valid (dry-run)' if options['dry_run'] else 'disimpan'
+        self.stdout.write(self.style.SUCCESS(f"✅ {hasil['dibuat']} baris {label}, {hasil['jurnal']} jurnal dibuat."))
+        if hasil['errors']:
+            self.stdout.write(self.style.WARNING(f"⚠️  {len(hasil['errors'])} baris dilewati:"))
+            for nomor, pesan in hasil['errors'][:20]:
+                self.stdout.write(f'  baris {nomor}: {pesan}')
+            if len(hasil['errors']) > 20:
+                self.stdout.write(f"  ... dan {len(hasil['errors']) - 20} baris lainnya")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Bangun ulang tabel ringkasan SaldoBulanan dari Jurnal dan cek drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Hanya cek drift tanpa menulis ulang tabel',
+        )
+
+    def handle(self, *args, **options):
+        from finance.saldo import cek_drift_saldo_bulanan, rebuild_saldo_bulanan
+
+        drift = cek_drift_saldo_bulanan()
+        if drift:
+            self.stdout.write(self.style.WARNING(f'⚠️  Ditemukan {len(drift)} baris SaldoBulanan yang tidak sinkron:'))
+            for d in drift[:20]:
+                self.stdout.write(
+                    f"  akun_id={d['akun_id']} {d['bulan']:02d}/{d['tahun']}: "
+                    f"debit {d['debit_tersimpan']} → {d['debit_seharusnya']}, "
+                    f"kredit {d['kredit_tersimpan']} → {d['kredit_seharusnya']}"
+                )
+            if len(drift) > 20:
+                self.stdout.write(f'  ... dan {len(drift) - 20} baris lainnya')
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ SaldoBulanan sinkron dengan Jurnal.'))
+
+        if options['check']:
+            return
+
+        total = rebuild_saldo_bulanan()
+        self.stdout.write(self.style.SUCCESS(f'✅ SaldoBulanan dibangun ulang: {total} baris.'))
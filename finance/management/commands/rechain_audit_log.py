@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Susun ulang hash chain AuditLog per chunk (bisa dilanjutkan jika terputus)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk', type=int, default=2000,
+            help='Jumlah blok per transaksi (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        from finance.blockchain import rechain_audit_logs
+
+        def progress(diproses, total):
+            self.stdout.write(f'   ... {diproses}/{total} blok', ending='\r')
+
+        self.stdout.write('🔗 Menyusun ulang hash chain AuditLog...')
+        hasil = rechain_audit_logs(chunk_size=options['chunk'], progress=progress)
+        self.stdout.write('')
+        if hasil['dilanjutkan']:
+            self.stdout.write('   (melanjutkan proses sebelumnya yang terputus)')
+        self.stdout.write(self.style.SUCCESS(f"✅ {hasil['diproses']} blok disusun ulang."))
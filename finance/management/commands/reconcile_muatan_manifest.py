@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Cek & hitung ulang kolom muatan OpsManifest (jumlah_barang, total_berat) dari OpsOutbound'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Hanya cek drift tanpa menulis ulang kolom',
+        )
+
+    def handle(self, *args, **options):
+        from finance.ops_sync import cek_drift_muatan_manifest, rekonsiliasi_muatan_manifest
+
+        drift = cek_drift_muatan_manifest()
+        if drift:
+            self.stdout.write(self.style.WARNING(f'⚠️  Ditemukan {len(drift)} manifest yang muatannya tidak sinkron:'))
+            for d in drift[:20]:
+                self.stdout.write(
+                    f"  {d['nomor_manifest']}: jumlah {d['jumlah_barang']} → {d['jumlah_seharusnya']}, "
+                    f"berat {d['total_berat']} → {d['berat_seharusnya']}"
+                )
+            if len(drift) > 20:
+                self.stdout.write(f'  ... dan {len(drift) - 20} manifest lainnya')
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Muatan OpsManifest sinkron dengan OpsOutbound.'))
+
+        if options['check'] or not drift:
+            return
+
+        total = rekonsiliasi_muatan_manifest()
+        self.stdout.write(self.style.SUCCESS(f'✅ Muatan dihitung ulang untuk {total} manifest.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Tutup buku bulanan: simpan checkpoint saldo kumulatif semua akun per akhir bulan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bulan', type=int, required=True, help='Bulan (1-12)')
+        parser.add_argument('--tahun', type=int, required=True, help='Tahun, contoh: 2026')
+
+    def handle(self, *args, **options):
+        from finance.saldo import tutup_buku_periode
+
+        bulan, tahun = options['bulan'], options['tahun']
+        if not 1 <= bulan <= 12:
+            raise CommandError('Bulan harus 1-12.')
+
+        checkpoint = tutup_buku_periode(tahun, bulan)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Tutup buku {bulan}/{tahun} selesai: {checkpoint.saldo_akun.count()} saldo akun disimpan.'
+        ))
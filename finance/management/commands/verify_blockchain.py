@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Verifikasi hash chain AuditLog dan simpan hasilnya untuk Blockchain Explorer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--deep', action='store_true',
+            help='Verifikasi penuh dari Genesis (abaikan checkpoint)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Verifikasi penuh paralel dengan N proses (0 = tidak paralel)',
+        )
+
+    def handle(self, *args, **options):
+        from finance.blockchain import refresh_verification_state, verify_blockchain_parallel
+
+        mode = 'penuh' if options['deep'] else 'inkremental'
+        if options['workers']:
+            mode = f"paralel, {options['workers']} proses"
+        self.stdout.write(f'🔗 Verifikasi blockchain ({mode})...')
+
+        def progress(diperiksa, total):
+            self.stdout.write(f'   ... {diperiksa}/{total} blok diperiksa', ending='\r')
+
+        if options['workers']:
+            result = verify_blockchain_parallel(workers=options['workers'], progress=progress)
+        else:
+            result = refresh_verification_state(deep=options['deep'], progress=progress)
+        self.stdout.write('')
+
+        self.stdout.write(
+            f"   {result['total_blocks']} blok, {result.get('verified_blocks', 0)} di-hash ulang"
+            f" mulai block #{result.get('checkpoint', 0) + 1}"
+            + (f" ({result['elapsed_s']} detik)" if 'elapsed_s' in result else '')
+        )
+        if result['is_valid'] and not result['tampered_count']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {result['message']}"))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"❌ {result['message']} ({result['tampered_count']} blok ditandai manipulasi)"
+            ))
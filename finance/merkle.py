@@ -0,0 +1,163 @@
+"""
+Merkle root per segmen blok AuditLog.
+
+Chain HMAC bersifat linear: membuktikan satu blok tidak diubah berarti
+menghitung ulang chain sampai blok itu. Di sini setiap SEGMENT_SIZE blok
+dirangkum menjadi satu Merkle root (disimpan di AuditMerkleSegment), sehingga
+keberadaan satu blok dalam segmennya cukup dibuktikan dengan log2(SEGMENT_SIZE)
+hash saudara (inclusion proof).
+
+    leaf  = SHA256(0x00 || "block_index|block_hash")
+    node  = SHA256(0x01 || kiri || kanan)
+
+Node tanpa pasangan di suatu level dinaikkan apa adanya (tidak diduplikasi),
+agar dua daftar blok berbeda tidak bisa menghasilkan root yang sama.
+Proof membuktikan block_hash tercatat di root; kecocokan isi blok dengan
+block_hash tetap diverifikasi server (HMAC dengan SECRET_KEY).
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+
+SEGMENT_SIZE = getattr(settings, 'AUDIT_MERKLE_SEGMENT_SIZE', 1024)
+
+
+def merkle_leaf(block_index, block_hash):
+    return hashlib.sha256(b'\x00' + f"{block_index}|{block_hash}".encode('utf-8')).hexdigest()
+
+
+def _node(kiri, kanan):
+    return hashlib.sha256(b'\x01' + bytes.fromhex(kiri) + bytes.fromhex(kanan)).hexdigest()
+
+
+def _levels(leaves):
+    """Semua level pohon, dari daun (level 0) sampai root."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        naik = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            naik.append(level[-1])
+        levels.append(naik)
+    return levels
+
+
+def merkle_root(leaves):
+    return _levels(leaves)[-1][0] if leaves else "0" * 64
+
+
+def merkle_proof(leaves, posisi):
+    """Hash saudara dari daun ke-`posisi` sampai root: [{'sisi': 'kiri'|'kanan', 'hash': ...}]."""
+    proof = []
+    for level in _levels(leaves)[:-1]:
+        saudara = posisi ^ 1
+        if saudara < len(level):
+            proof.append({'sisi': 'kiri' if saudara < posisi else 'kanan', 'hash': level[saudara]})
+        posisi //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf, proof, root):
+    """Hitung ulang root dari daun + proof (O(log n)) dan bandingkan dengan root."""
+    h = leaf
+    for langkah in proof:
+        h = _node(langkah['hash'], h) if langkah['sisi'] == 'kiri' else _node(h, langkah['hash'])
+    return hmac.compare_digest(h, root)
+
+
+def sign_root(segment, root):
+    """HMAC-SHA256 atas (segmen, root) — root tersimpan tidak bisa dipalsukan tanpa SECRET_KEY."""
+    return hmac.new(
+        settings.SECRET_KEY.encode('utf-8'),
+        f"merkle|{segment}|{root}".encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def segment_bounds(segment):
+    start = segment * SEGMENT_SIZE + 1
+    return start, start + SEGMENT_SIZE - 1
+
+
+def _segment_leaves(start, end):
+    from .models import AuditLog
+
+    rows = AuditLog.objects.filter(block_index__range=(start, end)).order_by('block_index')
+    return [merkle_leaf(index, block_hash) for index, block_hash in rows.values_list('block_index', 'block_hash')]
+
+
+def seal_merkle_segments(until_index):
+    """
+    Hitung & simpan root untuk setiap segmen PENUH yang belum punya root,
+    sampai block until_index (blok yang sudah terverifikasi). Return jumlah segmen baru.
+    """
+    from .models import AuditMerkleSegment
+
+    sudah = set(AuditMerkleSegment.objects.values_list('segment', flat=True))
+    baru = []
+    for segment in range(until_index // SEGMENT_SIZE):
+        if segment in sudah:
+            continue
+        start, end = segment_bounds(segment)
+        leaves = _segment_leaves(start, end)
+        if len(leaves) != SEGMENT_SIZE:
+            continue
+        root = merkle_root(leaves)
+        baru.append(AuditMerkleSegment(
+            segment=segment, start_index=start, end_index=end,
+            root=root, signature=sign_root(segment, root),
+        ))
+    AuditMerkleSegment.objects.bulk_create(baru, ignore_conflicts=True)
+    return len(baru)
+
+
+def get_inclusion_proof(block_index):
+    """
+    Inclusion proof untuk satu blok. Segmen yang belum penuh / belum disegel
+    dihitung langsung dari DB (sealed=False). Return None jika blok tidak ada.
+    """
+    from .models import AuditLog, AuditMerkleSegment
+
+    block_hash = AuditLog.objects.filter(block_index=block_index).values_list('block_hash', flat=True).first()
+    if block_hash is None:
+        return None
+
+    segment = (block_index - 1) // SEGMENT_SIZE
+    start, end = segment_bounds(segment)
+    leaves = _segment_leaves(start, end)
+    leaf = merkle_leaf(block_index, block_hash)
+    posisi = block_index - start
+    if posisi >= len(leaves) or leaves[posisi] != leaf:
+        # Index dalam segmen tidak berurutan (ada blok hilang) → proof tidak bisa dibuat
+        return None
+
+    tersimpan = AuditMerkleSegment.objects.filter(segment=segment).first()
+    if tersimpan:
+        root = tersimpan.root
+        root_sah = hmac.compare_digest(tersimpan.signature, sign_root(segment, root))
+    else:
+        root = merkle_root(leaves)
+        root_sah = None
+    proof = merkle_proof(leaves, posisi)
+    return {
+        'block_index': block_index,
+        'block_hash': block_hash,
+        'leaf': leaf,
+        'segment': segment,
+        'segment_range': [start, end],
+        'root': root,
+        'sealed': tersimpan is not None,
+        'root_signature_valid': root_sah,
+        'proof': proof,
+        'valid': verify_merkle_proof(leaf, proof, root),
+    }
+
+
+def get_segment_roots():
+    """Daftar root tersegel (untuk disertakan di backup)."""
+    from .models import AuditMerkleSegment
+
+    return list(AuditMerkleSegment.objects.order_by('segment').values(
+        'segment', 'start_index', 'end_index', 'root', 'signature'
+    ))
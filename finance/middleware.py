@@ -18,10 +18,21 @@ def get_current_ip():
     return getattr(_thread_locals, 'ip_address', None)
 
 
+def reset_current_user():
+    """Kosongkan user & IP di thread ini (akhir request, atau awal job di thread pakai ulang)."""
+    _thread_locals.user = None
+    _thread_locals.ip_address = None
+
+
 class CurrentUserMiddleware:
     """
     Middleware yang menyimpan request.user dan IP address ke thread-local.
     Ini memungkinkan Django Signals mengakses info user tanpa menerima request.
+
+    Thread worker dipakai ulang antar request (dan oleh pekerjaan non-request
+    seperti command/job di thread yang sama), jadi nilainya dikosongkan lagi
+    setelah response — termasuk saat view melempar exception. Tanpa ini log
+    audit berikutnya di thread itu tercatat atas nama user & IP request lama.
     """
 
     def __init__(self, get_response):
@@ -34,5 +45,7 @@ class CurrentUserMiddleware:
             request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
             or request.META.get('REMOTE_ADDR')
         )
-        response = self.get_response(request)
-        return response
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_user()
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def isi_saldo_bulanan(apps, schema_editor):
+    """Isi SaldoBulanan dari Jurnal yang sudah ada."""
+    Jurnal = apps.get_model('finance', 'Jurnal')
+    SaldoBulanan = apps.get_model('finance', 'SaldoBulanan')
+
+    totals = {}
+    base = Jurnal.objects.order_by().annotate(tahun=ExtractYear('tanggal'), bulan=ExtractMonth('tanggal'))
+    for sisi, field in ((0, 'akun_debit'), (1, 'akun_kredit')):
+        for row in base.values(field, 'tahun', 'bulan').annotate(total=Sum('nominal')):
+            key = (row[field], row['tahun'], row['bulan'])
+            totals.setdefault(key, [0, 0])[sisi] += row['total'] or 0
+
+    SaldoBulanan.objects.bulk_create([
+        SaldoBulanan(akun_id=akun_id, tahun=tahun, bulan=bulan, debit_total=d, kredit_total=k)
+        for (akun_id, tahun, bulan), (d, k) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0015_auditlog_add_block_index_db_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoBulanan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tahun', models.IntegerField()),
+                ('bulan', models.IntegerField()),
+                ('debit_total', models.DecimalField(decimal_places=0, default=0, max_digits=18)),
+                ('kredit_total', models.DecimalField(decimal_places=0, default=0, max_digits=18)),
+                ('akun', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldo_bulanan', to='finance.akun')),
+            ],
+            options={
+                'verbose_name': 'Saldo Bulanan',
+                'verbose_name_plural': 'Saldo Bulanan',
+                'ordering': ['tahun', 'bulan', 'akun'],
+                'unique_together': {('akun', 'tahun', 'bulan')},
+            },
+        ),
+        migrations.RunPython(isi_saldo_bulanan, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0016_saldobulanan'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutupBuku',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tahun', models.IntegerField()),
+                ('bulan', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ditutup_oleh', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tutup_buku', to=settings.AUTH_USER_MODEL, verbose_name='Ditutup Oleh')),
+            ],
+            options={
+                'verbose_name': 'Tutup Buku',
+                'verbose_name_plural': 'Tutup Buku',
+                'ordering': ['-tahun', '-bulan'],
+                'unique_together': {('tahun', 'bulan')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoPenutupan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit_kumulatif', models.DecimalField(decimal_places=0, default=0, max_digits=18)),
+                ('kredit_kumulatif', models.DecimalField(decimal_places=0, default=0, max_digits=18)),
+                ('akun', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldo_penutupan', to='finance.akun')),
+                ('tutup_buku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldo_akun', to='finance.tutupbuku')),
+            ],
+            options={
+                'verbose_name': 'Saldo Penutupan',
+                'verbose_name_plural': 'Saldo Penutupan',
+                'unique_together': {('tutup_buku', 'akun')},
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+def isi_sumber_jurnal(apps, schema_editor):
+    """
+    Tautkan jurnal otomatis lama ke dokumen sumbernya dengan mencocokkan
+    uraian persis seperti yang dulu dibuat oleh signal.
+    """
+    Jurnal = apps.get_model('finance', 'Jurnal')
+    InboundTransaction = apps.get_model('finance', 'InboundTransaction')
+    Manifest = apps.get_model('finance', 'Manifest')
+    Cashbon = apps.get_model('finance', 'Cashbon')
+    Penggajian = apps.get_model('finance', 'Penggajian')
+
+    # {uraian: (sumber_model, sumber_id, sumber_peran)}
+    peta = {}
+    for pk, no_resi, vendor in InboundTransaction.objects.values_list('id', 'no_resi', 'vendor').iterator():
+        peta[f"Invoice Inbound: {no_resi} - {vendor}"] = ('inbound', pk, 'invoice')
+    for pk, kategori, no_resi in Manifest.objects.values_list('id', 'kategori', 'no_resi').iterator():
+        peta[f"Hutang Manifest: {kategori} - {no_resi}"] = ('manifest', pk, 'hutang')
+        peta[f"DP Manifest: {kategori} - {no_resi}"] = ('manifest', pk, 'dp')
+    for pk, nama in Cashbon.objects.values_list('id', 'karyawan__nama').iterator():
+        peta[f"Cashbon #{pk}: {nama}"] = ('cashbon', pk, 'cashbon')
+    for pk, nama, bulan, tahun in Penggajian.objects.values_list('id', 'karyawan__nama', 'bulan', 'tahun').iterator():
+        uraian = f"Gaji: {nama} - {bulan}/{tahun}"
+        peta[uraian] = ('penggajian', pk, 'kas')
+        peta[uraian + " (Pot. Kasbon)"] = ('penggajian', pk, 'pot_kasbon')
+
+    batch = []
+    for jurnal in Jurnal.objects.filter(sumber_model='').only('id', 'uraian').iterator(chunk_size=2000):
+        sumber = peta.get(jurnal.uraian)
+        if sumber:
+            jurnal.sumber_model, jurnal.sumber_id, jurnal.sumber_peran = sumber
+            batch.append(jurnal)
+    Jurnal.objects.bulk_update(batch, ['sumber_model', 'sumber_id', 'sumber_peran'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0017_tutupbuku_saldopenutupan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jurnal',
+            name='sumber_id',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jurnal',
+            name='sumber_model',
+            field=models.CharField(blank=True, default='', editable=False, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='jurnal',
+            name='sumber_peran',
+            field=models.CharField(blank=True, default='', editable=False, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='jurnal',
+            index=models.Index(fields=['sumber_model', 'sumber_id', 'sumber_peran'], name='jurnal_sumber_idx'),
+        ),
+        migrations.RunPython(isi_sumber_jurnal, migrations.RunPython.noop),
+    ]
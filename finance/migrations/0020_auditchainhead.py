@@ -0,0 +1,65 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def cek_block_index_unik(apps, schema_editor):
+    """
+    Tolak migrasi jika masih ada block_index kembar (chain bercabang),
+    karena constraint unik tidak bisa dipasang di atas data seperti itu.
+    """
+    AuditLog = apps.get_model('finance', 'AuditLog')
+    kembar = list(
+        AuditLog.objects.values('block_index')
+        .annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('block_index', flat=True)[:10]
+    )
+    if kembar:
+        raise RuntimeError(
+            f"AuditLog punya block_index kembar: {kembar}. Susun ulang chain dulu "
+            "dengan `python manage.py rechain_audit_log`, lalu migrate lagi."
+        )
+
+
+def isi_chain_head(apps, schema_editor):
+    """Inisialisasi penunjuk ujung chain dari blok terakhir yang sudah ada."""
+    AuditLog = apps.get_model('finance', 'AuditLog')
+    AuditChainHead = apps.get_model('finance', 'AuditChainHead')
+    last = AuditLog.objects.order_by('-block_index').values('block_index', 'block_hash').first()
+    AuditChainHead.objects.update_or_create(pk=1, defaults={
+        'block_index': last['block_index'] if last else 0,
+        'block_hash': (last['block_hash'] if last else None) or "0" * 64,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0019_auditlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(cek_block_index_unik, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='finance_aud_block_i_9be327_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='auditlog',
+            constraint=models.UniqueConstraint(fields=('block_index',), name='auditlog_block_index_unik'),
+        ),
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_index', models.IntegerField(default=0, verbose_name='Nomor Block Terakhir')),
+                ('block_hash', models.CharField(default='0000000000000000000000000000000000000000000000000000000000000000', max_length=64, verbose_name='Hash Block Terakhir')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Chain Head',
+            },
+        ),
+        migrations.RunPython(isi_chain_head, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0020_auditchainhead'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_index', models.IntegerField(unique=True, verbose_name='Nomor Block')),
+                ('block_hash', models.CharField(max_length=64, verbose_name='Hash Block')),
+                ('signature', models.CharField(max_length=64, verbose_name='HMAC Checkpoint')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Checkpoint',
+                'ordering': ['-block_index'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0021_auditcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditVerifikasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verified_until', models.IntegerField(default=0, verbose_name='Diverifikasi Sampai Block')),
+                ('is_valid', models.BooleanField(default=True, verbose_name='Chain Valid')),
+                ('mode', models.CharField(blank=True, max_length=12, verbose_name='Mode')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Pesan')),
+                ('jumlah_tamper', models.IntegerField(default=0, verbose_name='Jumlah Blok Manipulasi')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Terakhir Dijalankan')),
+            ],
+            options={
+                'verbose_name': 'Audit Verifikasi',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditTamper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_index', models.IntegerField(db_index=True, verbose_name='Nomor Block')),
+                ('alasan', models.CharField(choices=[('data', 'Hash data tidak cocok'), ('chain', 'Chain linkage putus')], max_length=10, verbose_name='Alasan')),
+                ('detected_at', models.DateTimeField(auto_now_add=True, verbose_name='Terdeteksi')),
+                ('log', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tamper', to='finance.auditlog', verbose_name='Block')),
+            ],
+            options={
+                'verbose_name': 'Audit Tamper',
+                'ordering': ['block_index'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0022_auditverifikasi_audittamper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditMerkleSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segment', models.IntegerField(unique=True, verbose_name='Nomor Segmen')),
+                ('start_index', models.IntegerField(verbose_name='Block Awal')),
+                ('end_index', models.IntegerField(verbose_name='Block Akhir')),
+                ('root', models.CharField(max_length=64, verbose_name='Merkle Root')),
+                ('signature', models.CharField(max_length=64, verbose_name='HMAC Root')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Merkle Segment',
+                'ordering': ['segment'],
+            },
+        ),
+    ]
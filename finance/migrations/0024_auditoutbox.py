@@ -0,0 +1,35 @@
+# Generated by Django 6.0.5 on 2026-10-18 12:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0023_auditmerklesegment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='Nama Model')),
+                ('object_id', models.CharField(max_length=50, verbose_name='ID Objek')),
+                ('object_repr', models.CharField(max_length=255, verbose_name='Representasi Objek')),
+                ('action', models.CharField(choices=[('CREATE', 'Tambah Data'), ('UPDATE', 'Ubah Data'), ('DELETE', 'Hapus Data')], max_length=10, verbose_name='Aksi')),
+                ('changes', models.JSONField(blank=True, default=dict, verbose_name='Detail Perubahan')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP Address')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Waktu')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Audit Outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.5 on 2026-10-18 12:10
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def isi_muatan(apps, schema_editor):
+    """Isi kolom muatan dari OpsOutbound yang sudah ada (satu UPDATE)."""
+    OpsManifest = apps.get_model('finance', 'OpsManifest')
+    OpsOutbound = apps.get_model('finance', 'OpsOutbound')
+    per_manifest = OpsOutbound.objects.filter(manifest=OuterRef('pk')).order_by().values('manifest')
+    OpsManifest.objects.update(
+        jumlah_barang=Coalesce(Subquery(per_manifest.annotate(n=Count('id')).values('n')), 0),
+        total_berat=Coalesce(
+            Subquery(per_manifest.annotate(b=Sum('inbound__berat')).values('b')),
+            Value(0), output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0024_auditoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opsmanifest',
+            name='jumlah_barang',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Jumlah barang outbound di manifest ini'),
+        ),
+        migrations.AddField(
+            model_name='opsmanifest',
+            name='total_berat',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total berat seluruh barang (Kg)', max_digits=12),
+        ),
+        migrations.RunPython(isi_muatan, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,39 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.utils import timezone
 
-class Akun(models.Model):
+
+class AuditOutboxAtomikMixin:
+    """
+    Mode AUDIT_ASYNC: save() dijalankan di dalam transaction.atomic() agar baris
+    AuditOutbox yang ditulis signal post_save ikut commit/rollback bersama datanya
+    (di autocommit, post_save dikirim setelah INSERT/UPDATE sudah commit).
+    Di dalam transaksi pemanggil blok ini menjadi savepoint. Mode sinkron tidak
+    terpengaruh.
+    """
+
+    def save(self, *args, **kwargs):
+        if not getattr(settings, 'AUDIT_ASYNC', False):
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().save(*args, **kwargs)
+
+
+class AuditSnapshotMixin:
+    """
+    Snapshot audit (lihat finance.signals) ikut diperbarui saat field dimuat ulang
+    dari DB — refresh_from_db() eksplisit maupun akses field deferred. Tanpa ini
+    perubahan penulis lain yang baru dimuat tercatat sebagai perubahan user ini
+    pada save berikutnya.
+    """
+
+    def refresh_from_db(self, using=None, fields=None, *args, **kwargs):
+        super().refresh_from_db(using, fields, *args, **kwargs)
+        from .signals import segarkan_snapshot
+        segarkan_snapshot(self, fields)
+
+
+class Akun(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     KATEGORI_CHOICES = [
         ('ASSET', 'Harta (Aktiva)'),
         ('LIABILITY', 'Kewajiban (Utang)'),
@@ -23,7 +55,7 @@ class Akun(models.Model):
             return 'DEBIT'
         return 'CREDIT'
 
-class Jurnal(models.Model):
+class Jurnal(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     tanggal = models.DateField()
     uraian = models.CharField(max_length=255, help_text="Keterangan transaksi")
     akun_debit = models.ForeignKey(Akun, on_delete=models.CASCADE, related_name='debit_entries', verbose_name="Akun Debit")
@@ -31,17 +63,164 @@ class Jurnal(models.Model):
     nominal = models.DecimalField(max_digits=15, decimal_places=0, help_text="Jumlah Rupiah")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Dokumen sumber untuk jurnal otomatis (kosong = jurnal manual).
+    # Contoh: ('inbound', 12, 'invoice'), ('manifest', 7, 'dp'), ('penggajian', 3, 'kas')
+    sumber_model = models.CharField(max_length=30, blank=True, default='', editable=False)
+    sumber_id = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    sumber_peran = models.CharField(max_length=30, blank=True, default='', editable=False)
+
     class Meta:
         ordering = ['-tanggal', '-created_at']
         verbose_name_plural = "Jurnal Umum"
+        indexes = [
+            models.Index(fields=['sumber_model', 'sumber_id', 'sumber_peran'], name='jurnal_sumber_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tanggal} - {self.uraian} - Rp {self.nominal:,}"
 
+    def save(self, *args, **kwargs):
+        """
+        Simpan jurnal dan update ringkasan SaldoBulanan dalam SATU transaksi,
+        sehingga tabel ringkasan tidak pernah tertinggal dari Jurnal.
+        """
+        with transaction.atomic():
+            lama = None
+            if self.pk:
+                lama = Jurnal.objects.filter(pk=self.pk).values(
+                    'akun_debit_id', 'akun_kredit_id', 'tanggal', 'nominal'
+                ).first()
+            super().save(*args, **kwargs)
+
+            tanggal = self._meta.get_field('tanggal').to_python(self.tanggal)
+            nominal = self._meta.get_field('nominal').to_python(self.nominal)
+            baru = {
+                'akun_debit_id': self.akun_debit_id, 'akun_kredit_id': self.akun_kredit_id,
+                'tanggal': tanggal, 'nominal': nominal,
+            }
+            if lama == baru:
+                return
+            if lama and lama['akun_debit_id'] == self.akun_debit_id and lama['akun_kredit_id'] == self.akun_kredit_id \
+                    and (lama['tanggal'].year, lama['tanggal'].month) == (tanggal.year, tanggal.month):
+                # Akun & bulan sama → cukup terapkan selisih nominal sekali
+                SaldoBulanan.terapkan(self.akun_debit_id, self.akun_kredit_id, tanggal, nominal - lama['nominal'])
+                return
+            if lama:
+                SaldoBulanan.terapkan(
+                    lama['akun_debit_id'], lama['akun_kredit_id'], lama['tanggal'], -lama['nominal']
+                )
+            SaldoBulanan.terapkan(self.akun_debit_id, self.akun_kredit_id, tanggal, nominal)
+
+
+class SaldoBulanan(models.Model):
+    """
+    Ringkasan mutasi per akun per bulan (materialized dari Jurnal).
+    Di-update incremental oleh Jurnal.save() dan signal post_delete Jurnal,
+    sehingga laporan cukup membaca O(akun × bulan) baris, bukan seluruh Jurnal.
+    Rebuild / cek drift: `python manage.py rebuild_saldo_bulanan`.
+    """
+    akun = models.ForeignKey(Akun, on_delete=models.CASCADE, related_name='saldo_bulanan')
+    tahun = models.IntegerField()
+    bulan = models.IntegerField()  # 1-12
+    debit_total = models.DecimalField(max_digits=18, decimal_places=0, default=0)
+    kredit_total = models.DecimalField(max_digits=18, decimal_places=0, default=0)
+
+    class Meta:
+        unique_together = ['akun', 'tahun', 'bulan']
+        ordering = ['tahun', 'bulan', 'akun']
+        verbose_name = "Saldo Bulanan"
+        verbose_name_plural = "Saldo Bulanan"
+
+    def __str__(self):
+        return f"{self.akun} - {self.bulan}/{self.tahun}"
+
+    @classmethod
+    def terapkan(cls, akun_debit_id, akun_kredit_id, tanggal, nominal):
+        """
+        Tambahkan mutasi satu jurnal ke ringkasan bulanannya.
+        Nominal negatif = membatalkan jurnal (update/delete).
+        """
+        if not nominal:
+            return
+        for akun_id, field in ((akun_debit_id, 'debit_total'), (akun_kredit_id, 'kredit_total')):
+            updated = cls.objects.filter(
+                akun_id=akun_id, tahun=tanggal.year, bulan=tanggal.month
+            ).update(**{field: models.F(field) + nominal})
+            # Pengurangan tanpa baris berarti drift (atau akun sedang dihapus) — jangan buat baris baru
+            if not updated and nominal > 0:
+                obj, created = cls.objects.get_or_create(
+                    akun_id=akun_id, tahun=tanggal.year, bulan=tanggal.month,
+                    defaults={field: nominal}
+                )
+                if not created:
+                    cls.objects.filter(pk=obj.pk).update(**{field: models.F(field) + nominal})
+
+        # Jurnal mundur ke periode yang sudah ditutup → koreksi checkpoint-nya juga
+        tutup_ids = list(TutupBuku.objects.filter(
+            models.Q(tahun__gt=tanggal.year) | models.Q(tahun=tanggal.year, bulan__gte=tanggal.month)
+        ).values_list('id', flat=True))
+        if tutup_ids:
+            SaldoPenutupan.sesuaikan(tutup_ids, akun_debit_id, 'debit_kumulatif', nominal)
+            SaldoPenutupan.sesuaikan(tutup_ids, akun_kredit_id, 'kredit_kumulatif', nominal)
+
+
+class TutupBuku(models.Model):
+    """
+    Penutupan periode (tutup buku bulanan).
+    Menyimpan snapshot saldo kumulatif setiap akun per akhir bulan (SaldoPenutupan),
+    sehingga saldo Neraca = checkpoint terakhir + mutasi sesudahnya,
+    tanpa scan seluruh histori Jurnal.
+    """
+    tahun = models.IntegerField()
+    bulan = models.IntegerField()  # 1-12
+    ditutup_oleh = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='tutup_buku', verbose_name="Ditutup Oleh"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['tahun', 'bulan']
+        ordering = ['-tahun', '-bulan']
+        verbose_name = "Tutup Buku"
+        verbose_name_plural = "Tutup Buku"
+
+    def __str__(self):
+        return f"Tutup Buku {self.bulan}/{self.tahun}"
+
+
+class SaldoPenutupan(models.Model):
+    """Saldo kumulatif (sejak awal pembukuan) satu akun per akhir periode TutupBuku."""
+    tutup_buku = models.ForeignKey(TutupBuku, on_delete=models.CASCADE, related_name='saldo_akun')
+    akun = models.ForeignKey(Akun, on_delete=models.CASCADE, related_name='saldo_penutupan')
+    debit_kumulatif = models.DecimalField(max_digits=18, decimal_places=0, default=0)
+    kredit_kumulatif = models.DecimalField(max_digits=18, decimal_places=0, default=0)
+
+    class Meta:
+        unique_together = ['tutup_buku', 'akun']
+        verbose_name = "Saldo Penutupan"
+        verbose_name_plural = "Saldo Penutupan"
+
+    def __str__(self):
+        return f"{self.tutup_buku} - {self.akun}"
+
+    @classmethod
+    def sesuaikan(cls, tutup_ids, akun_id, field, nominal):
+        """Tambahkan mutasi ke saldo kumulatif akun pada checkpoint-checkpoint yang diberikan."""
+        updated = cls.objects.filter(tutup_buku_id__in=tutup_ids, akun_id=akun_id).update(
+            **{field: models.F(field) + nominal}
+        )
+        if updated < len(tutup_ids) and nominal > 0:
+            ada = set(cls.objects.filter(tutup_buku_id__in=tutup_ids, akun_id=akun_id).values_list('tutup_buku_id', flat=True))
+            cls.objects.bulk_create([
+                cls(tutup_buku_id=tid, akun_id=akun_id, **{field: nominal})
+                for tid in tutup_ids if tid not in ada
+            ])
+
 # ============================================
 # MODEL INVOICE TAGIHAN (Kolektif)
 # ============================================
-class InvoiceTagihan(models.Model):
+class InvoiceTagihan(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     no_invoice = models.CharField(max_length=50, unique=True)
     customer = models.CharField(max_length=100) # Nama Customer (Vendor di Inbound)
     tanggal = models.DateField(default=timezone.now)
@@ -62,7 +241,7 @@ class InvoiceTagihan(models.Model):
 # ============================================
 # MODEL INBOUND (Barang Masuk) - Updated
 # ============================================
-class InboundTransaction(models.Model):
+class InboundTransaction(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     # Relasi ke Invoice Tagihan (bs null jika belum ditagihkan)
     invoice = models.ForeignKey(InvoiceTagihan, on_delete=models.SET_NULL, null=True, blank=True, related_name='inbound_items')
     
@@ -93,6 +272,36 @@ class InboundTransaction(models.Model):
 # --- SIGNALS FOR AUTO JOURNAL ---
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from .akun_lookup import get_akun
+
+
+def jurnal_sumber(model, instance, peran=None):
+    """QuerySet jurnal otomatis milik dokumen sumber (opsional satu peran saja)."""
+    qs = Jurnal.objects.filter(sumber_model=model, sumber_id=instance.pk)
+    if peran is not None:
+        qs = qs.filter(sumber_peran=peran)
+    return qs
+
+
+def simpan_jurnal_sumber(model, instance, peran, **fields):
+    """Buat atau update jurnal otomatis (model, instance.pk, peran) dengan nilai `fields`."""
+    jurnal = jurnal_sumber(model, instance, peran).first()
+    if jurnal:
+        for name, value in fields.items():
+            setattr(jurnal, name, value)
+        jurnal.save()
+        return jurnal
+    return Jurnal.objects.create(
+        sumber_model=model, sumber_id=instance.pk, sumber_peran=peran, **fields
+    )
+
+
+@receiver(post_delete, sender=Jurnal)
+def update_saldo_bulanan_on_delete(sender, instance, **kwargs):
+    """Kurangi SaldoBulanan saat jurnal dihapus (berjalan di dalam transaksi delete)."""
+    SaldoBulanan.terapkan(
+        instance.akun_debit_id, instance.akun_kredit_id, instance.tanggal, -instance.nominal
+    )
 
 @receiver(post_save, sender=InboundTransaction)
 def create_or_update_jurnal_inbound(sender, instance, created, **kwargs):
@@ -104,56 +313,32 @@ def create_or_update_jurnal_inbound(sender, instance, created, **kwargs):
     if instance.total_biaya <= 0:
         return
 
-    # Cari Akun
-    try:
-        akun_piutang = Akun.objects.get(kode='112') # Piutang Usaha
-    except Akun.DoesNotExist:
-        # Fallback cari berdasarkan nama atau create dummy (sebaiknya jangan create dummy sembarangan)
-        akun_piutang = Akun.objects.filter(nama__icontains='Piutang').first()
-        if not akun_piutang: return # Abort if no account
-
-    try:
-        akun_pendapatan = Akun.objects.get(kode='402') # Pendapatan Jasa Inbound
-    except Akun.DoesNotExist:
-        try:
-            akun_pendapatan = Akun.objects.get(kode='401') # Pendapatan Jasa Umum
-        except Akun.DoesNotExist:
-            return # Abort
-
-    uraian_jurnal = f"Invoice Inbound: {instance.no_resi} - {instance.vendor}"
-    tanggal_jurnal = instance.tanggal_masuk_stt or instance.created_at.date()
-
-    # Cek apakah jurnal sudah ada (berdasarkan uraian unik ini)
-    jurnal = Jurnal.objects.filter(uraian=uraian_jurnal).first()
-
-    if jurnal:
-        # Update existing
-        jurnal.tanggal = tanggal_jurnal
-        jurnal.akun_debit = akun_piutang
-        jurnal.akun_kredit = akun_pendapatan
-        jurnal.nominal = instance.total_biaya
-        jurnal.save()
-    else:
-        # Create new
-        Jurnal.objects.create(
-            tanggal=tanggal_jurnal,
-            uraian=uraian_jurnal,
-            akun_debit=akun_piutang,
-            akun_kredit=akun_pendapatan,
-            nominal=instance.total_biaya
-        )
+    # Cari Akun (cache per peran, lihat finance.akun_lookup)
+    akun_piutang = get_akun('piutang_usaha')  # 112 Piutang Usaha
+    akun_pendapatan = get_akun('pendapatan_inbound')  # 402 Pendapatan Jasa Inbound / 401 Umum
+    if not akun_piutang or not akun_pendapatan:
+        return # Abort if no account
+
+    # Create/update berdasarkan dokumen sumber (uraian ikut diperbarui bila vendor berubah)
+    simpan_jurnal_sumber(
+        'inbound', instance, 'invoice',
+        tanggal=instance.tanggal_masuk_stt or instance.created_at.date(),
+        uraian=f"Invoice Inbound: {instance.no_resi} - {instance.vendor}",
+        akun_debit=akun_piutang,
+        akun_kredit=akun_pendapatan,
+        nominal=instance.total_biaya
+    )
 
 @receiver(post_delete, sender=InboundTransaction)
 def delete_jurnal_inbound(sender, instance, **kwargs):
     """Hapus jurnal jika transaksi inbound dihapus"""
-    uraian_jurnal = f"Invoice Inbound: {instance.no_resi} - {instance.vendor}"
-    Jurnal.objects.filter(uraian=uraian_jurnal).delete()
+    jurnal_sumber('inbound', instance).delete()
 
 
 # ============================================
 # MODEL OUTBOUND (Barang Keluar) - Updated for Lap_outbond format
 # ============================================
-class OutboundTransaction(models.Model):
+class OutboundTransaction(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     # Kolom sesuai Lap_outbond_bmm_Agustus_2022.csv
     tanggal = models.DateField(null=True, blank=True, verbose_name="Tanggal")
     pengirim = models.CharField(max_length=200, null=True, blank=True)
@@ -193,7 +378,7 @@ class OutboundTransaction(models.Model):
 # ============================================
 # MODEL PENERIMAAN (Pendapatan Di Luar Piutang)
 # ============================================
-class Penerimaan(models.Model):
+class Penerimaan(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     tanggal = models.DateField()
     keterangan = models.CharField(max_length=255)
     nilai = models.DecimalField(max_digits=15, decimal_places=0, default=0)
@@ -213,7 +398,7 @@ class Penerimaan(models.Model):
 # ============================================
 # MODEL MANIFEST (Hutang ke Vendor)
 # ============================================
-class Manifest(models.Model):
+class Manifest(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     KATEGORI_CHOICES = [
         ('HULU', 'Hulu'),
         ('KETAPANG', 'Ketapang'),
@@ -279,46 +464,23 @@ def create_or_update_jurnal_manifest(sender, instance, created, **kwargs):
     # =============================================
     if instance.total > 0:
         # Cari Akun Hutang (211)
-        try:
-            akun_hutang = Akun.objects.get(kode='211') 
-        except Akun.DoesNotExist:
-            akun_hutang = Akun.objects.filter(nama__icontains='Hutang').first()
-
-        # Cari Akun Beban Pengiriman (505 - Biaya Pengiriman Vendor)
-        try:
-            akun_beban = Akun.objects.get(kode='505')
-        except Akun.DoesNotExist:
-            # Fallback 1: Cari by nama
-            akun_beban = Akun.objects.filter(nama__icontains='Biaya Pengiriman Vendor').first()
-            
-        if not akun_beban:
-            # Fallback 2: Biaya Lain-lain (514) daripada masuk Biaya Gaji
-            akun_beban = Akun.objects.filter(kode='514').first()
-            
-        if not akun_beban:
-            # Fallback 3: Cari akun biaya logistik lainnya
-            akun_beban = Akun.objects.filter(nama__icontains='Pengiriman').first()
+        akun_hutang = get_akun('hutang_vendor')
+
+        # Cari Akun Beban Pengiriman (505 - Biaya Pengiriman Vendor),
+        # fallback: nama, Biaya Lain-lain (514), akun biaya logistik lainnya
+        akun_beban = get_akun('beban_pengiriman')
         
         if not akun_beban: return
 
         if akun_hutang and akun_beban:
-            uraian_hutang = f"Hutang Manifest: {instance.kategori} - {instance.no_resi}"
-            jurnal_hutang = Jurnal.objects.filter(uraian=uraian_hutang).first()
-
-            if jurnal_hutang:
-                jurnal_hutang.tanggal = tanggal_jurnal
-                jurnal_hutang.akun_debit = akun_beban
-                jurnal_hutang.akun_kredit = akun_hutang
-                jurnal_hutang.nominal = instance.total
-                jurnal_hutang.save()
-            else:
-                Jurnal.objects.create(
-                    tanggal=tanggal_jurnal,
-                    uraian=uraian_hutang,
-                    akun_debit=akun_beban,
-                    akun_kredit=akun_hutang,
-                    nominal=instance.total
-                )
+            simpan_jurnal_sumber(
+                'manifest', instance, 'hutang',
+                tanggal=tanggal_jurnal,
+                uraian=f"Hutang Manifest: {instance.kategori} - {instance.no_resi}",
+                akun_debit=akun_beban,
+                akun_kredit=akun_hutang,
+                nominal=instance.total
+            )
 
     # =============================================
     # JURNAL 2: DP / BIAYA DIBAYAR DIMUKA (jika ada)
@@ -328,59 +490,34 @@ def create_or_update_jurnal_manifest(sender, instance, created, **kwargs):
     uraian_dp = f"DP Manifest: {instance.kategori} - {instance.no_resi}"
     
     if instance.dp and instance.dp > 0:
-        # Cari Akun Beban (Gunakan logika yang sama dgn Hutang)
-        try:
-            akun_debit_dp = Akun.objects.get(kode='505')
-        except Akun.DoesNotExist:
-            akun_debit_dp = Akun.objects.filter(nama__icontains='Biaya Pengiriman Vendor').first()
-            
-        if not akun_debit_dp:
-             # Fallback ke 514 atau akun beban lainnya
-             akun_debit_dp = Akun.objects.filter(kode='514').first()
-        
-        if not akun_debit_dp:
-             # Last resort asset
-             akun_debit_dp = Akun.objects.filter(kode='115').first()
+        # Cari Akun Beban (505 → nama → 514, last resort asset 115)
+        akun_debit_dp = get_akun('beban_dp_manifest')
 
         # Cari Akun Kas (101)
-        try:
-            akun_kas = Akun.objects.get(kode='101')
-        except Akun.DoesNotExist:
-            akun_kas = Akun.objects.filter(nama__icontains='Kas').first()
+        akun_kas = get_akun('kas')
         
         if akun_debit_dp and akun_kas:
-            jurnal_dp = Jurnal.objects.filter(uraian=uraian_dp).first()
-            
-            if jurnal_dp:
-                jurnal_dp.tanggal = tanggal_jurnal
-                jurnal_dp.akun_debit = akun_debit_dp
-                jurnal_dp.akun_kredit = akun_kas
-                jurnal_dp.nominal = instance.dp
-                jurnal_dp.save()
-            else:
-                Jurnal.objects.create(
-                    tanggal=tanggal_jurnal,
-                    uraian=uraian_dp,
-                    akun_debit=akun_debit_dp,
-                    akun_kredit=akun_kas,
-                    nominal=instance.dp
-                )
+            simpan_jurnal_sumber(
+                'manifest', instance, 'dp',
+                tanggal=tanggal_jurnal,
+                uraian=uraian_dp,
+                akun_debit=akun_debit_dp,
+                akun_kredit=akun_kas,
+                nominal=instance.dp
+            )
     else:
         # Jika DP dihapus/dikosongkan, hapus jurnal DP-nya
-        Jurnal.objects.filter(uraian=uraian_dp).delete()
+        jurnal_sumber('manifest', instance, 'dp').delete()
 
 @receiver(post_delete, sender=Manifest)
 def delete_jurnal_manifest(sender, instance, **kwargs):
     """Hapus semua jurnal terkait manifest yang dihapus"""
-    uraian_hutang = f"Hutang Manifest: {instance.kategori} - {instance.no_resi}"
-    uraian_dp = f"DP Manifest: {instance.kategori} - {instance.no_resi}"
-    Jurnal.objects.filter(uraian=uraian_hutang).delete()
-    Jurnal.objects.filter(uraian=uraian_dp).delete()
+    jurnal_sumber('manifest', instance).delete()
 
 # ============================================
 # MODEL KAS HARIAN (Standalone - Tidak Link ke Jurnal)
 # ============================================
-class KasHarian(models.Model):
+class KasHarian(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     JENIS_CHOICES = [
         ('MASUK', 'Kas Masuk'),
         ('KELUAR', 'Kas Keluar'),
@@ -438,7 +575,7 @@ def update_invoice_total_on_delete(sender, instance, **kwargs):
 # ============================================
 # MODEL GAJI & KARYAWAN
 # ============================================
-class Karyawan(models.Model):
+class Karyawan(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     nama = models.CharField(max_length=100)
     posisi = models.CharField(max_length=100, null=True, blank=True)
     gaji_pokok = models.DecimalField(max_digits=15, decimal_places=0, default=0)
@@ -451,7 +588,7 @@ class Karyawan(models.Model):
     def __str__(self):
         return self.nama
 
-class Cashbon(models.Model):
+class Cashbon(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     karyawan = models.ForeignKey(Karyawan, on_delete=models.CASCADE, related_name='cashbons')
     tanggal = models.DateField(default=timezone.now)
     nominal = models.DecimalField(max_digits=15, decimal_places=0)
@@ -477,53 +614,25 @@ def create_or_update_jurnal_cashbon(sender, instance, created, **kwargs):
     if instance.nominal <= 0:
         return
 
-    # Cari Akun Piutang Karyawan (113)
-    try:
-        akun_piutang = Akun.objects.get(kode='113')
-    except Akun.DoesNotExist:
-        akun_piutang = Akun.objects.filter(nama__icontains='Karyawan').first()
-        if not akun_piutang: return
-
-    # Cari Akun Kas (101)
-    try:
-        akun_kas = Akun.objects.get(kode='101')
-    except Akun.DoesNotExist:
-        akun_kas = Akun.objects.filter(nama__icontains='Kas').first()
-        if not akun_kas: return
-
-    uraian_jurnal = f"Cashbon: {instance.karyawan.nama} - {instance.tanggal}"
-    tanggal_jurnal = instance.tanggal
-
-    # Cek jurnal existing
-    jurnal = Jurnal.objects.filter(uraian=uraian_jurnal, nominal=instance.nominal).first() # Tambah filter nominal biar lebih spesifik jika tgl & nama sama
-    
-    # Karena uraian bisa sama (orang sama, tgl sama), sebaiknya pakai ID unik di uraian atau approach lain.
-    # Approach better: Gunakan uraian dengan ID cashbon untuk avoid duplicate match yg salah
-    uraian_jurnal_unique = f"Cashbon #{instance.id}: {instance.karyawan.nama}"
-    
-    jurnal = Jurnal.objects.filter(uraian=uraian_jurnal_unique).first()
-
-    if jurnal:
-        jurnal.tanggal = tanggal_jurnal
-        jurnal.akun_debit = akun_piutang
-        jurnal.akun_kredit = akun_kas
-        jurnal.nominal = instance.nominal
-        jurnal.save()
-    else:
-        Jurnal.objects.create(
-            tanggal=tanggal_jurnal,
-            uraian=uraian_jurnal_unique,
-            akun_debit=akun_piutang,
-            akun_kredit=akun_kas,
-            nominal=instance.nominal
-        )
+    # Cari Akun Piutang Karyawan (113) & Kas (101)
+    akun_piutang = get_akun('piutang_karyawan')
+    akun_kas = get_akun('kas')
+    if not akun_piutang or not akun_kas: return
+
+    simpan_jurnal_sumber(
+        'cashbon', instance, 'cashbon',
+        tanggal=instance.tanggal,
+        uraian=f"Cashbon #{instance.id}: {instance.karyawan.nama}",
+        akun_debit=akun_piutang,
+        akun_kredit=akun_kas,
+        nominal=instance.nominal
+    )
 
 @receiver(post_delete, sender=Cashbon)
 def delete_jurnal_cashbon(sender, instance, **kwargs):
-    uraian_jurnal_unique = f"Cashbon #{instance.id}: {instance.karyawan.nama}"
-    Jurnal.objects.filter(uraian=uraian_jurnal_unique).delete()
+    jurnal_sumber('cashbon', instance).delete()
 
-class Penggajian(models.Model):
+class Penggajian(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     """
     Rekap Gaji Bulanan per Karyawan.
     Menggabungkan Gaji Pokok, Lembur, dan Potongan-potongan.
@@ -577,34 +686,22 @@ def create_or_update_jurnal_gaji(sender, instance, created, **kwargs):
     if total_kotor <= 0:
         return
 
-    # 1. Cari Akun Biaya Gaji (501)
-    try:
-        akun_biaya_gaji = Akun.objects.get(kode='501')
-    except Akun.DoesNotExist:
-        akun_biaya_gaji = Akun.objects.filter(nama__icontains='Gaji').first()
-        if not akun_biaya_gaji: return
-
-    # 2. Cari Akun Kas (101)
-    try:
-        akun_kas = Akun.objects.get(kode='101')
-    except Akun.DoesNotExist:
-        akun_kas = Akun.objects.filter(nama__icontains='Kas').first()
-        if not akun_kas: return
+    # 1. Cari Akun Biaya Gaji (501) & 2. Kas (101)
+    akun_biaya_gaji = get_akun('biaya_gaji')
+    akun_kas = get_akun('kas')
+    if not akun_biaya_gaji or not akun_kas: return
 
     # 3. Cari Akun Piutang Karyawan (113) untuk potongan cashbon
     akun_piutang = None
     if instance.potongan_cashbon > 0:
-        try:
-            akun_piutang = Akun.objects.get(kode='113')
-        except Akun.DoesNotExist:
-            akun_piutang = Akun.objects.filter(nama__icontains='Karyawan').first()
+        akun_piutang = get_akun('piutang_karyawan')
 
     uraian_jurnal = f"Gaji: {instance.karyawan.nama} - {instance.bulan}/{instance.tahun}"
     tanggal_jurnal = instance.tanggal_gaji
 
     # Hapus jurnal lama jika ada (cara paling aman untuk update jurnal kompleks multi-kredit)
-    # Atau gunakan flag unik. Disini kita delete-create force update.
-    Jurnal.objects.filter(uraian=uraian_jurnal).delete()
+    # Disini kita delete-create force update, dicari lewat dokumen sumber.
+    jurnal_sumber('penggajian', instance).delete()
 
     # Create Jurnal
     # A. DEBIT BIAYA GAJI (Total Kotor)
@@ -616,6 +713,7 @@ def create_or_update_jurnal_gaji(sender, instance, created, **kwargs):
         Jurnal.objects.create(
             tanggal=tanggal_jurnal,
             uraian=uraian_jurnal + " (Pot. Kasbon)",
+            sumber_model='penggajian', sumber_id=instance.pk, sumber_peran='pot_kasbon',
             akun_debit=akun_biaya_gaji,
             akun_kredit=akun_piutang,
             nominal=instance.potongan_cashbon
@@ -641,6 +739,7 @@ def create_or_update_jurnal_gaji(sender, instance, created, **kwargs):
         Jurnal.objects.create(
             tanggal=tanggal_jurnal,
             uraian=uraian_jurnal,
+            sumber_model='penggajian', sumber_id=instance.pk, sumber_peran='kas',
             akun_debit=akun_biaya_gaji,
             akun_kredit=akun_kas,
             nominal=nominal_kas
@@ -648,13 +747,12 @@ def create_or_update_jurnal_gaji(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Penggajian)
 def delete_jurnal_gaji(sender, instance, **kwargs):
-    uraian_jurnal = f"Gaji: {instance.karyawan.nama} - {instance.bulan}/{instance.tahun}"
-    Jurnal.objects.filter(uraian__startswith=uraian_jurnal).delete()
+    jurnal_sumber('penggajian', instance).delete()
 # ============================================================
 # MODEL OPERASIONAL (Inbound, Outbound, Manifest)
 # ============================================================
 
-class OpsInbound(models.Model):
+class OpsInbound(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     """Penerimaan Barang — dicatat saat barang masuk ke gudang."""
     STATUS_CHOICES = [
         ('DITERIMA', 'Diterima di Gudang'),
@@ -692,10 +790,22 @@ class OpsInbound(models.Model):
         # Auto calculate total if weight and tariff are present
         if not self.total_biaya and self.berat and self.tarif_per_kg:
             self.total_biaya = self.berat * self.tarif_per_kg
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            berat_lama = None
+            if self.pk and not self._state.adding and (update_fields is None or 'berat' in update_fields):
+                berat_lama = OpsInbound.objects.filter(pk=self.pk).values_list('berat', flat=True).first()
+            super().save(*args, **kwargs)
+
+            # Berat barang yang sudah dimuat berubah → total_berat manifest-nya ikut
+            berat = self._meta.get_field('berat').to_python(self.berat)
+            if berat_lama is not None and berat_lama != berat:
+                OpsManifest.objects.filter(outbound_items__inbound_id=self.pk).update(
+                    total_berat=models.F('total_berat') + (berat - berat_lama)
+                )
 
 
-class OpsManifest(models.Model):
+class OpsManifest(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     """Manifest Pengiriman (Baru) — menggabungkan beberapa barang ke satu armada."""
     STATUS_CHOICES = [
         ('DRAFT', 'Draft'),
@@ -715,9 +825,16 @@ class OpsManifest(models.Model):
     total_hutang = models.DecimalField(max_digits=15, decimal_places=0, default=0)
     dp = models.DecimalField(max_digits=15, decimal_places=0, default=0, help_text="Uang Panjar / DP")
 
+    # Ringkasan muatan (denormalisasi dari OpsOutbound), di-update incremental oleh
+    # OpsOutbound.save() / signal post_delete. Cek & perbaiki: `python manage.py reconcile_muatan_manifest`.
+    jumlah_barang = models.PositiveIntegerField(default=0, editable=False, help_text="Jumlah barang outbound di manifest ini")
+    total_berat = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, help_text="Total berat seluruh barang (Kg)")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    MUATAN_FIELDS = ('jumlah_barang', 'total_berat')
+
     class Meta:
         ordering = ['-tanggal', '-created_at']
         verbose_name_plural = "Manifest Pengiriman"
@@ -725,20 +842,27 @@ class OpsManifest(models.Model):
     def __str__(self):
         return f"{self.nomor_manifest} — {self.armada} ({self.rute})"
 
-    @property
-    def total_berat(self):
-        """Hitung total berat seluruh barang di manifest ini."""
-        return self.outbound_items.aggregate(
-            total=models.Sum('inbound__berat')
-        )['total'] or 0
+    def save(self, *args, **kwargs):
+        # Kolom muatan hanya diubah lewat sesuaikan_muatan() — jangan ditimpa nilai basi di memori
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MUATAN_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
-    @property
-    def jumlah_barang(self):
-        """Hitung jumlah barang outbound di manifest ini."""
-        return self.outbound_items.count()
+    @classmethod
+    def sesuaikan_muatan(cls, manifest_id, jumlah, berat):
+        """Tambahkan selisih jumlah barang & berat ke manifest (atomic di sisi database)."""
+        if not jumlah and not berat:
+            return
+        cls.objects.filter(pk=manifest_id).update(
+            jumlah_barang=models.F('jumlah_barang') + jumlah,
+            total_berat=models.F('total_berat') + berat,
+        )
 
 
-class OpsOutbound(models.Model):
+class OpsOutbound(AuditSnapshotMixin, AuditOutboxAtomikMixin, models.Model):
     """Pengeluaran Barang — menghubungkan barang Inbound ke sebuah Manifest."""
     inbound = models.OneToOneField(
         OpsInbound, on_delete=models.CASCADE,
@@ -761,89 +885,65 @@ class OpsOutbound(models.Model):
     def __str__(self):
         return f"OUT: {self.inbound.nomor_resi} → Manifest {self.manifest.nomor_manifest}"
 
+    def save(self, *args, **kwargs):
+        """
+        Simpan outbound dan update kolom muatan OpsManifest dalam SATU transaksi,
+        sehingga jumlah_barang / total_berat tidak pernah tertinggal.
+        """
+        with transaction.atomic():
+            lama = None
+            if self.pk:
+                lama = OpsOutbound.objects.filter(pk=self.pk).values(
+                    'manifest_id', 'inbound_id', 'inbound__berat'
+                ).first()
+            super().save(*args, **kwargs)
+
+            if lama and lama['inbound_id'] == self.inbound_id:
+                berat = lama['inbound__berat']
+            else:
+                berat = self.inbound.berat
+            if lama and (lama['manifest_id'], lama['inbound__berat']) == (self.manifest_id, berat):
+                return
+            if lama:
+                OpsManifest.sesuaikan_muatan(lama['manifest_id'], -1, -lama['inbound__berat'])
+            OpsManifest.sesuaikan_muatan(self.manifest_id, 1, berat)
+
 # ============================================
 # SIGNALS FOR SYNCING NEW OPS TO LEGACY DATA
 # ============================================
 
 @receiver(post_save, sender=OpsInbound)
 def sync_ops_inbound_to_legacy(sender, instance, created, **kwargs):
-    """Sync OpsInbound data to InboundTransaction (Legacy)."""
-    legacy, created_legacy = InboundTransaction.objects.get_or_create(
-        no_resi=instance.nomor_resi
-    )
-    legacy.tanggal_masuk_stt = instance.tanggal
-    legacy.vendor = instance.vendor or instance.pengirim
-    legacy.tujuan = instance.tujuan
-    legacy.kilo = instance.berat
-    legacy.tarif_per_kg = str(instance.tarif_per_kg)
-    legacy.total_biaya = instance.total_biaya
-    legacy.keterangan = instance.keterangan
-    legacy.save()
+    """Sync OpsInbound data to InboundTransaction (Legacy), lihat finance.ops_sync."""
+    from .ops_sync import SUMBER_INBOUND, perlu_sync, sync_inbound
+    if perlu_sync(kwargs.get('update_fields'), SUMBER_INBOUND):
+        sync_inbound(instance)
 
 @receiver(post_save, sender=OpsManifest)
 def sync_ops_manifest_to_legacy(sender, instance, created, **kwargs):
-    """Sync OpsManifest data to Manifest (Legacy)."""
-    # Use defaults to satisfy NOT NULL constraints during creation
-    legacy, created_legacy = Manifest.objects.get_or_create(
-        no_resi=instance.nomor_manifest,
-        defaults={
-            'nomor_manifest': instance.nomor_manifest,
-            'tanggal': instance.tanggal,
-            'armada': instance.armada,
-            'rute': instance.rute,
-            'status': instance.status,
-            'catatan_ops': instance.catatan,
-            'armada_ops': instance.armada,
-            'rute_ops': instance.rute,
-            'kategori': 'HULU',
-            'tanggal_kirim': instance.tanggal,
-        }
-    )
-    
-    # Update fields (for both created and existing records)
-    legacy.tanggal_kirim = instance.tanggal
-    legacy.penerima = instance.vendor_penerima or instance.armada
-    legacy.tujuan = instance.rute
-    legacy.total = instance.total_hutang
-    legacy.dp = instance.dp
-    legacy.koli = instance.jumlah_barang
-    legacy.kg = instance.total_berat
-    
-    # Fill shadow fields to satisfy potential DB constraints
-    legacy.nomor_manifest = instance.nomor_manifest
-    legacy.tanggal = instance.tanggal
-    legacy.armada = instance.armada
-    legacy.rute = instance.rute
-    legacy.status = instance.status
-    legacy.catatan_ops = instance.catatan
-    legacy.armada_ops = instance.armada
-    legacy.rute_ops = instance.rute
-    
-    legacy.save()
+    """Sync OpsManifest data to Manifest (Legacy), lihat finance.ops_sync."""
+    from .ops_sync import SUMBER_MANIFEST, perlu_sync, sync_manifest
+    if perlu_sync(kwargs.get('update_fields'), SUMBER_MANIFEST):
+        sync_manifest(instance)
 
 @receiver(post_save, sender=OpsOutbound)
 def sync_ops_outbound_to_legacy(sender, instance, created, **kwargs):
     """Sync OpsOutbound data to OutboundTransaction (Legacy) and update Inbound status."""
-    # 1. Update Inbound Status
+    from .ops_sync import SUMBER_OUTBOUND, perlu_sync, sync_outbound
+    # 1. Update Inbound Status (update_fields=['status'] → inbound tidak di-sync ulang)
     if created:
         instance.inbound.status = 'DIKIRIM'
         instance.inbound.save(update_fields=['status'])
-    
+
     # 2. Update/Create OutboundTransaction
-    legacy, created_legacy = OutboundTransaction.objects.get_or_create(
-        no_resi_bmm=instance.inbound.nomor_resi
-    )
-    legacy.tanggal = instance.tanggal
-    legacy.pengirim = instance.inbound.pengirim
-    legacy.penerima = instance.inbound.penerima
-    legacy.koli = 0 
-    legacy.kg = str(instance.inbound.berat)
-    legacy.keterangan = instance.catatan
-    
-    # Default legacy vendor 1 to manifest info
-    legacy.vendor1_tgl = instance.manifest.tanggal
-    legacy.vendor1_resi = instance.manifest.nomor_manifest
-    legacy.save()
+    if perlu_sync(kwargs.get('update_fields'), SUMBER_OUTBOUND):
+        sync_outbound(instance)
+
+@receiver(post_delete, sender=OpsOutbound)
+def kurangi_muatan_manifest_on_delete(sender, instance, **kwargs):
+    """Kurangi muatan OpsManifest saat outbound dihapus (berjalan di dalam transaksi delete)."""
+    berat = OpsInbound.objects.filter(pk=instance.inbound_id).values_list('berat', flat=True).first()
+    OpsManifest.sesuaikan_muatan(instance.manifest_id, -1, -(berat or 0))
 
 @receiver(post_delete, sender=OpsOutbound)
 def reset_inbound_status_on_outbound_delete(sender, instance, **kwargs):
@@ -886,18 +986,151 @@ class AuditLog(models.Model):
     action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name="Aksi")
     changes = models.JSONField(default=dict, blank=True, verbose_name="Detail Perubahan")
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP Address")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Waktu")
+    # Diisi di Python sebelum INSERT (bukan auto_now_add) agar hash blok bisa
+    # dihitung lebih dulu dan blok ditulis dengan satu INSERT saja.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Waktu")
 
     class Meta:
         ordering = ['-timestamp']
         verbose_name = "Audit Log"
         verbose_name_plural = "Audit Logs"
+        constraints = [
+            # Dua blok dengan nomor sama = chain bercabang (fork) → ditolak database
+            models.UniqueConstraint(fields=['block_index'], name='auditlog_block_index_unik'),
+        ]
         indexes = [
-            models.Index(fields=['block_index']),
             models.Index(fields=['-timestamp']),
             models.Index(fields=['model_name', '-timestamp']),
             models.Index(fields=['user', '-timestamp']),
         ]
 
     def __str__(self):
-        return f"[{self.timestamp:%d/%m/%Y %H:%M}] {self.user} — {self.get_action_display()} {self.model_name}"
\ No newline at end of file
+        return f"[{self.timestamp:%d/%m/%Y %H:%M}] {self.user} — {self.get_action_display()} {self.model_name}"
+
+    @property
+    def changes_tampil(self):
+        """`changes` dalam bentuk lama/baru untuk tampilan (blok v2 dinormalisasi)."""
+        from .audit_policy import normalisasi_changes
+        return normalisasi_changes(self.changes)
+
+
+class AuditChainHead(models.Model):
+    """
+    Penunjuk ujung hash chain AuditLog (selalu satu baris, pk=1).
+    Append blok baru cukup mengunci baris ini, bukan scan + lock AuditLog terbaru.
+    """
+    block_index = models.IntegerField(default=0, verbose_name="Nomor Block Terakhir")
+    block_hash = models.CharField(max_length=64, default="0"*64, verbose_name="Hash Block Terakhir")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Audit Chain Head"
+
+    def __str__(self):
+        return f"Head #{self.block_index} ({self.block_hash[:12]}…)"
+
+
+class AuditCheckpoint(models.Model):
+    """
+    Titik verifikasi chain yang sudah terbukti valid (setiap N blok).
+    Verifikasi inkremental mulai dari checkpoint terakhir yang signature-nya sah,
+    bukan dari blok genesis.
+    """
+    block_index = models.IntegerField(unique=True, verbose_name="Nomor Block")
+    block_hash = models.CharField(max_length=64, verbose_name="Hash Block")
+    signature = models.CharField(max_length=64, verbose_name="HMAC Checkpoint")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-block_index']
+        verbose_name = "Audit Checkpoint"
+
+    def __str__(self):
+        return f"Checkpoint #{self.block_index} ({self.block_hash[:12]}…)"
+
+
+class AuditVerifikasi(models.Model):
+    """
+    Hasil verifikasi chain terakhir (selalu satu baris, pk=1).
+    Diisi oleh verifier (command verify_blockchain / tombol verifikasi),
+    dibaca explorer tanpa perlu hash ulang seluruh chain.
+    """
+    verified_until = models.IntegerField(default=0, verbose_name="Diverifikasi Sampai Block")
+    is_valid = models.BooleanField(default=True, verbose_name="Chain Valid")
+    mode = models.CharField(max_length=12, blank=True, verbose_name="Mode")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Pesan")
+    jumlah_tamper = models.IntegerField(default=0, verbose_name="Jumlah Blok Manipulasi")
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name="Terakhir Dijalankan")
+
+    class Meta:
+        verbose_name = "Audit Verifikasi"
+
+    def __str__(self):
+        return f"Verifikasi s/d #{self.verified_until} ({'valid' if self.is_valid else 'manipulasi'})"
+
+
+class AuditTamper(models.Model):
+    """Blok yang ditandai manipulasi oleh verifier (explorer cukup membaca flag per halaman)."""
+    ALASAN_CHOICES = [
+        ('data', 'Hash data tidak cocok'),
+        ('chain', 'Chain linkage putus'),
+    ]
+
+    log = models.OneToOneField(AuditLog, on_delete=models.CASCADE, related_name='tamper', verbose_name="Block")
+    block_index = models.IntegerField(db_index=True, verbose_name="Nomor Block")
+    alasan = models.CharField(max_length=10, choices=ALASAN_CHOICES, verbose_name="Alasan")
+    detected_at = models.DateTimeField(auto_now_add=True, verbose_name="Terdeteksi")
+
+    class Meta:
+        ordering = ['block_index']
+        verbose_name = "Audit Tamper"
+
+    def __str__(self):
+        return f"Block #{self.block_index}: {self.get_alasan_display()}"
+
+
+class AuditMerkleSegment(models.Model):
+    """
+    Merkle root atas satu segmen blok AuditLog berukuran tetap
+    (block_index start_index..end_index). Dipakai untuk inclusion proof O(log n).
+    """
+    segment = models.IntegerField(unique=True, verbose_name="Nomor Segmen")
+    start_index = models.IntegerField(verbose_name="Block Awal")
+    end_index = models.IntegerField(verbose_name="Block Akhir")
+    root = models.CharField(max_length=64, verbose_name="Merkle Root")
+    signature = models.CharField(max_length=64, verbose_name="HMAC Root")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['segment']
+        verbose_name = "Audit Merkle Segment"
+
+    def __str__(self):
+        return f"Segmen {self.segment} (#{self.start_index}–#{self.end_index}): {self.root[:12]}…"
+
+
+class AuditOutbox(models.Model):
+    """
+    Antrian event audit (mode AUDIT_ASYNC). Ditulis di transaksi yang sama dengan
+    save() datanya, lalu worker `audit_outbox_worker` memindahkannya ke hash chain
+    AuditLog sesuai urutan id — request tidak perlu menunggu lock chain.
+    """
+    user = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name="User"
+    )
+    model_name = models.CharField(max_length=100, verbose_name="Nama Model")
+    object_id = models.CharField(max_length=50, verbose_name="ID Objek")
+    object_repr = models.CharField(max_length=255, verbose_name="Representasi Objek")
+    action = models.CharField(max_length=10, choices=AuditLog.ACTION_CHOICES, verbose_name="Aksi")
+    changes = models.JSONField(default=dict, blank=True, verbose_name="Detail Perubahan")
+    ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP Address")
+    # Waktu event (bukan waktu masuk chain) — ikut dihitung di hash blok
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Waktu")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Audit Outbox"
+
+    def __str__(self):
+        return f"Outbox #{self.pk}: {self.action} {self.model_name} {self.object_id}"
@@ -0,0 +1,189 @@
+"""
+Sinkronisasi data operasional baru (OpsInbound / OpsManifest / OpsOutbound)
+ke tabel legacy (InboundTransaction / Manifest / OutboundTransaction).
+
+Pola lama per save: get_or_create + save() penuh pada baris legacy, yang
+memicu signal auto-jurnal, signal total invoice, re-fetch audit pre_save dan
+satu blok audit — meskipun tidak ada nilai yang berubah.
+
+Di sini per sinkronisasi:
+1. State target baris legacy dihitung dari objek Ops.
+2. Baris legacy dibaca sekali; hanya field yang BENAR-BENAR berubah ditulis
+   dengan satu UPDATE (baris baru: satu INSERT biasa, signal berjalan normal).
+3. Efek samping signal dikerjakan langsung dan hanya jika field terkait
+   berubah: jurnal otomatis, total invoice, log audit UPDATE. Semua event
+   audit satu sinkronisasi ditulis ke hash chain sekaligus (audit_batch).
+"""
+import copy
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .audit_policy import changes_update
+from .models import (
+    InboundTransaction, Manifest, OutboundTransaction, OpsManifest, OpsOutbound,
+    create_or_update_jurnal_inbound, create_or_update_jurnal_manifest,
+    update_invoice_total_on_save,
+)
+from .signals import audit_batch, catat_audit
+
+# Field sumber Ops yang dipakai target legacy — save(update_fields=...) di luar
+# field ini (misal hanya 'status') tidak perlu sinkronisasi
+SUMBER_INBOUND = {'nomor_resi', 'tanggal', 'vendor', 'pengirim', 'tujuan', 'berat', 'tarif_per_kg', 'total_biaya', 'keterangan'}
+SUMBER_MANIFEST = {'nomor_manifest', 'tanggal', 'armada', 'rute', 'status', 'catatan', 'vendor_penerima', 'total_hutang', 'dp'}
+SUMBER_OUTBOUND = {'inbound', 'manifest', 'tanggal', 'catatan'}
+
+# Field legacy yang mempengaruhi jurnal otomatis
+JURNAL_INBOUND = {'tanggal_masuk_stt', 'vendor', 'total_biaya'}
+JURNAL_MANIFEST = {'tanggal_kirim', 'total', 'dp'}
+
+
+def perlu_sync(update_fields, sumber):
+    """False jika save() hanya menulis field yang tidak dipakai sinkronisasi."""
+    return not update_fields or bool(set(update_fields) & sumber)
+
+
+def sinkronkan(model, lookup, target, defaults_baru=None):
+    """
+    Samakan satu baris legacy `model` (dicari lewat `lookup`) dengan `target`.
+
+    Returns:
+        (obj, berubah) — `berubah` = set nama field yang ditulis dengan UPDATE.
+        Baris baru dibuat dengan create() biasa (signal jurnal & audit berjalan),
+        sehingga `berubah` kosong.
+    """
+    obj = model.objects.filter(**lookup).first()
+    if obj is None:
+        data = {**lookup, **(defaults_baru or {}), **target}
+        return model.objects.create(**data), set()
+
+    lama = copy.copy(obj)
+    perubahan = {}
+    for name, value in target.items():
+        field = model._meta.get_field(name)
+        value = field.to_python(value)
+        if getattr(obj, field.attname) != value:
+            perubahan[name] = value
+    if not perubahan:
+        return obj, set()
+
+    berubah = set(perubahan)
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            perubahan[field.name] = timezone.now()
+    model.objects.filter(pk=obj.pk).update(**perubahan)
+    for name, value in perubahan.items():
+        setattr(obj, name, value)
+
+    changes = changes_update(obj, lama)
+    if changes:
+        catat_audit('UPDATE', obj, changes)
+    return obj, berubah
+
+
+def sync_inbound(ops):
+    """OpsInbound → InboundTransaction (+ jurnal piutang & total invoice bila perlu)."""
+    target = {
+        'tanggal_masuk_stt': ops.tanggal,
+        'vendor': ops.vendor or ops.pengirim,
+        'tujuan': ops.tujuan,
+        'kilo': ops.berat,
+        'tarif_per_kg': str(ops.tarif_per_kg),
+        'total_biaya': ops.total_biaya,
+        'keterangan': ops.keterangan,
+    }
+    with audit_batch():
+        legacy, berubah = sinkronkan(InboundTransaction, {'no_resi': ops.nomor_resi}, target)
+        if berubah & JURNAL_INBOUND:
+            create_or_update_jurnal_inbound(InboundTransaction, legacy, created=False)
+        if 'total_biaya' in berubah and legacy.invoice_id:
+            update_invoice_total_on_save(InboundTransaction, legacy)
+    return legacy
+
+
+def sync_manifest(ops):
+    """OpsManifest → Manifest legacy (+ jurnal hutang & DP bila perlu)."""
+    # Kolom muatan tersimpan dibaca ulang dari DB: instance di memori bisa basi
+    # jika outbound ditambah/dihapus setelah manifest dimuat
+    jumlah, berat = OpsManifest.objects.filter(pk=ops.pk).values_list(*OpsManifest.MUATAN_FIELDS).get()
+    target = {
+        'tanggal_kirim': ops.tanggal,
+        'penerima': ops.vendor_penerima or ops.armada,
+        'tujuan': ops.rute,
+        'total': ops.total_hutang,
+        'dp': ops.dp,
+        'koli': jumlah,
+        'kg': berat,
+        # Shadow fields
+        'nomor_manifest': ops.nomor_manifest,
+        'tanggal': ops.tanggal,
+        'armada': ops.armada,
+        'rute': ops.rute,
+        'status': ops.status,
+        'catatan_ops': ops.catatan,
+        'armada_ops': ops.armada,
+        'rute_ops': ops.rute,
+    }
+    with audit_batch():
+        legacy, berubah = sinkronkan(Manifest, {'no_resi': ops.nomor_manifest}, target, {'kategori': 'HULU'})
+        if berubah & JURNAL_MANIFEST:
+            create_or_update_jurnal_manifest(Manifest, legacy, created=False)
+    return legacy
+
+
+def sync_outbound(ops):
+    """OpsOutbound → OutboundTransaction (tidak punya jurnal otomatis)."""
+    inbound, manifest = ops.inbound, ops.manifest
+    target = {
+        'tanggal': ops.tanggal,
+        'pengirim': inbound.pengirim,
+        'penerima': inbound.penerima,
+        'koli': 0,
+        'kg': str(inbound.berat),
+        'keterangan': ops.catatan,
+        # Default legacy vendor 1 ke info manifest
+        'vendor1_tgl': manifest.tanggal,
+        'vendor1_resi': manifest.nomor_manifest,
+    }
+    with audit_batch():
+        legacy, _ = sinkronkan(OutboundTransaction, {'no_resi_bmm': inbound.nomor_resi}, target)
+    return legacy
+
+
+# ============================================================
+# MUATAN MANIFEST (jumlah_barang / total_berat tersimpan)
+# ============================================================
+
+def _muatan_seharusnya():
+    """Ekspresi (jumlah_barang, total_berat) hasil agregasi ulang OpsOutbound per manifest."""
+    per_manifest = OpsOutbound.objects.filter(manifest=OuterRef('pk')).order_by().values('manifest')
+    jumlah = Coalesce(Subquery(per_manifest.annotate(n=Count('id')).values('n')), 0)
+    berat = Coalesce(
+        Subquery(per_manifest.annotate(b=Sum('inbound__berat')).values('b')),
+        Value(0), output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return jumlah, berat
+
+
+def cek_drift_muatan_manifest():
+    """
+    Bandingkan kolom muatan tersimpan dengan hasil agregasi ulang OpsOutbound.
+    Return list dict manifest yang berbeda (kosong = tidak ada drift).
+    """
+    jumlah, berat = _muatan_seharusnya()
+    rows = OpsManifest.objects.annotate(jumlah_seharusnya=jumlah, berat_seharusnya=berat).order_by('pk').values(
+        'pk', 'nomor_manifest', 'jumlah_barang', 'total_berat', 'jumlah_seharusnya', 'berat_seharusnya'
+    )
+    return [
+        m for m in rows
+        if (m['jumlah_barang'], m['total_berat']) != (m['jumlah_seharusnya'], m['berat_seharusnya'])
+    ]
+
+
+def rekonsiliasi_muatan_manifest():
+    """Hitung ulang muatan SEMUA manifest dengan satu UPDATE. Return jumlah baris."""
+    jumlah, berat = _muatan_seharusnya()
+    with transaction.atomic():
+        return OpsManifest.objects.update(jumlah_barang=jumlah, total_berat=berat)
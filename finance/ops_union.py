@@ -0,0 +1,171 @@
+"""
+Daftar gabungan data operasional baru (Ops*) + data lama (legacy) di sisi database.
+
+Pola lama di view list: semua baris Ops* dan legacy yang cocok diambil,
+diubah ke dict di Python, di-sort, baru dipaginasi — halaman 1 sama mahalnya
+dengan membaca seluruh tabel.
+
+Di sini kedua sisi dinormalisasi ke kolom yang sama dengan values(), lalu
+digabung dengan UNION ALL dan diurutkan di SQL:
+
+    SELECT 'new', id, nomor_resi, ... FROM finance_opsinbound WHERE ...
+    UNION ALL
+    SELECT 'legacy', id, no_resi, ... FROM finance_inboundtransaction WHERE ...
+    ORDER BY k_urut DESC, k_source DESC, k_pk DESC
+    LIMIT 20 OFFSET ...
+
+Paginator hanya menjalankan satu COUNT dan satu query halaman (20 baris).
+"""
+from django.db.models import Case, CharField, DateField, F, Q, Value, When
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from .models import (
+    OpsInbound, InboundTransaction, OpsManifest, Manifest, OpsOutbound, OutboundTransaction,
+)
+
+# Kolom union diberi awalan agar tidak bentrok dengan nama field model
+AWALAN = 'k_'
+URUTAN = ('-k_urut', '-k_source', '-k_pk')
+
+
+class BarisGabungan:
+    """
+    Bungkus queryset UNION untuk Paginator: count() → COUNT di SQL,
+    slice → LIMIT/OFFSET, setiap baris → dict dengan key yang dipakai template.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        rows = self.queryset[key]
+        if isinstance(key, slice):
+            return [_baris(row) for row in rows]
+        return _baris(rows)
+
+
+def _baris(row):
+    return {name[len(AWALAN):]: value for name, value in row.items()}
+
+
+def _teks(value):
+    return Value(value, output_field=CharField())
+
+
+def _label_status(choices):
+    """CASE status → label pilihan (get_status_display() di SQL)."""
+    return Case(*[When(status=kode, then=_teks(label)) for kode, label in choices],
+                default=F('status'), output_field=CharField())
+
+
+def _kolom(queryset, source, tanggal, **kolom):
+    """
+    values() ternormalisasi satu sisi UNION. Semua kolom berupa anotasi dengan
+    urutan sama (k_source, k_pk, k_urut, ...), syarat UNION yang valid.
+    """
+    hari_ini = timezone.now().date()
+    semua = {
+        'source': _teks(source),
+        'pk': F('pk'),
+        # Tanggal kosong diurutkan sebagai hari ini (sama seperti sort Python lama)
+        'urut': Coalesce(F(tanggal), Value(hari_ini, output_field=DateField())),
+        'tanggal': F(tanggal),
+        **kolom,
+    }
+    semua = {AWALAN + name: expr for name, expr in semua.items()}
+    return queryset.order_by().annotate(**semua).values(*semua)
+
+
+def _gabung(*bagian):
+    bagian = [qs for qs in bagian if qs is not None]
+    return BarisGabungan(bagian[0].union(*bagian[1:], all=True).order_by(*URUTAN))
+
+
+def _filter_periode(queryset, field, bulan, tahun):
+    if bulan: queryset = queryset.filter(**{f'{field}__month': int(bulan)})
+    if tahun: queryset = queryset.filter(**{f'{field}__year': int(tahun)})
+    return queryset
+
+
+def inbound_gabungan(search='', bulan=None, tahun=None, status=''):
+    """OpsInbound + InboundTransaction, terbaru dulu."""
+    baru = lama = None
+    if status != 'LEGACY':
+        qs = OpsInbound.objects.all()
+        if search:
+            qs = qs.filter(Q(nomor_resi__icontains=search) | Q(pengirim__icontains=search) | Q(penerima__icontains=search))
+        if status:
+            qs = qs.filter(status=status)
+        baru = _kolom(
+            _filter_periode(qs, 'tanggal', bulan, tahun), 'new', 'tanggal',
+            nomor_resi=F('nomor_resi'), pengirim=F('pengirim'), penerima=F('penerima'),
+            asal=F('asal'), tujuan=F('tujuan'), berat=F('berat'),
+            status_display=_label_status(OpsInbound.STATUS_CHOICES), status_raw=F('status'),
+        )
+    if not status or status == 'LEGACY':
+        qs = InboundTransaction.objects.all()
+        if search:
+            qs = qs.filter(Q(no_resi__icontains=search) | Q(vendor__icontains=search) | Q(tujuan__icontains=search))
+        lama = _kolom(
+            _filter_periode(qs, 'tanggal_masuk_stt', bulan, tahun), 'legacy', 'tanggal_masuk_stt',
+            nomor_resi=F('no_resi'), pengirim=F('vendor'), penerima=_teks('-'),
+            asal=_teks('-'), tujuan=F('tujuan'), berat=F('kilo'),
+            status_display=_teks('Data Riwayat (Lama)'), status_raw=_teks('LEGACY'),
+        )
+    return _gabung(baru, lama)
+
+
+def manifest_gabungan(search='', bulan=None, tahun=None, status=''):
+    """OpsManifest + Manifest legacy, terbaru dulu (muatan dari kolom tersimpan)."""
+    baru = lama = None
+    if status != 'LEGACY':
+        qs = OpsManifest.objects.all()
+        if search:
+            qs = qs.filter(Q(nomor_manifest__icontains=search) | Q(armada__icontains=search))
+        if status:
+            qs = qs.filter(status=status)
+        baru = _kolom(
+            _filter_periode(qs, 'tanggal', bulan, tahun), 'new', 'tanggal',
+            nomor_manifest=F('nomor_manifest'), armada=F('armada'), rute=F('rute'),
+            jumlah=F('jumlah_barang'), berat=F('total_berat'),
+            status=F('status'), status_display=_label_status(OpsManifest.STATUS_CHOICES),
+        )
+    if not status or status == 'LEGACY':
+        qs = Manifest.objects.all()
+        if search:
+            qs = qs.filter(Q(no_resi__icontains=search) | Q(pengirim__icontains=search))
+        lama = _kolom(
+            _filter_periode(qs, 'tanggal_kirim', bulan, tahun), 'legacy', 'tanggal_kirim',
+            nomor_manifest=F('no_resi'), armada=F('penerima'), rute=F('tujuan'),
+            jumlah=F('koli'), berat=F('kg'),
+            status=_teks('LEGACY'), status_display=_teks('Data Riwayat (Lama)'),
+        )
+    return _gabung(baru, lama)
+
+
+def outbound_gabungan(search='', bulan=None, tahun=None):
+    """OpsOutbound + OutboundTransaction, terbaru dulu."""
+    qs = OpsOutbound.objects.all()
+    if search:
+        qs = qs.filter(Q(inbound__nomor_resi__icontains=search) | Q(manifest__nomor_manifest__icontains=search))
+    baru = _kolom(
+        _filter_periode(qs, 'tanggal', bulan, tahun), 'new', 'tanggal',
+        nomor_resi_inbound=F('inbound__nomor_resi'), nomor_manifest=F('manifest__nomor_manifest'),
+        rute=F('manifest__rute'), catatan=F('catatan'),
+    )
+    qs = OutboundTransaction.objects.all()
+    if search:
+        qs = qs.filter(Q(no_resi_bmm__icontains=search) | Q(pengirim__icontains=search))
+    lama = _kolom(
+        _filter_periode(qs, 'tanggal', bulan, tahun), 'legacy', 'tanggal',
+        nomor_resi_inbound=F('no_resi_bmm'), nomor_manifest=_teks('-'),
+        rute=_teks('-'), catatan=Concat(_teks('Fatih: '), 'pengirim', output_field=CharField()),
+    )
+    return _gabung(baru, lama)
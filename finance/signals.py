@@ -5,14 +5,24 @@ Mencatat setiap aksi Create, Update, Delete beserta detail perubahan.
 NOTE: Signals untuk auto-jurnal (InboundTransaction, Manifest, Cashbon, Penggajian)
 sudah ada di models.py. File ini HANYA untuk Audit Log.
 """
-from django.db.models.signals import post_save, pre_save, post_delete
+import copy
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_init, post_save, pre_save, post_delete
 from django.dispatch import receiver
 
 from django.contrib.auth.models import User
+from .audit_policy import changes_create, changes_delete, changes_update
 from .models import (
     Akun, Jurnal, InboundTransaction, OutboundTransaction, Manifest,
     KasHarian, Karyawan, Cashbon, Penggajian, InvoiceTagihan,
-    OpsInbound, OpsManifest, OpsOutbound, Penerimaan, AuditLog,
+    OpsInbound, OpsManifest, OpsOutbound, Penerimaan, AuditLog, AuditChainHead, AuditOutbox,
+    AuditSnapshotMixin,
 )
 from .middleware import get_current_user, get_current_ip
 
@@ -22,78 +32,265 @@ from .middleware import get_current_user, get_current_ip
 # ============================================================
 
 def _get_field_changes(instance, old_instance):
-    """Bandingkan field instance lama vs baru, return dict perubahan."""
-    changes = {}
-    for field in instance._meta.fields:
-        field_name = field.name
-        if field_name in ('id', 'created_at', 'updated_at', 'password'):
-            continue
-        old_val = getattr(old_instance, field_name, None)
-        new_val = getattr(instance, field_name, None)
-        if old_val != new_val:
-            changes[field_name] = {
-                'lama': str(old_val) if old_val is not None else '',
-                'baru': str(new_val) if new_val is not None else '',
-            }
-    return changes
+    """Bandingkan field instance lama vs baru (sesuai kebijakan audit), return diff v2 atau None."""
+    return changes_update(instance, old_instance)
 
 
 def _get_all_fields(instance):
-    """Return semua field sebagai dict untuk log CREATE."""
-    data = {}
-    for field in instance._meta.fields:
-        field_name = field.name
-        if field_name in ('id', 'created_at', 'updated_at', 'password'):
-            continue
-        val = getattr(instance, field_name, None)
-        if val is not None:
-            data[field_name] = str(val)
-    return data
+    """Return semua field (sesuai kebijakan audit) sebagai diff v2 untuk log CREATE."""
+    return changes_create(instance)
 
 
-def _create_log(action, instance, changes=None):
-    """Helper untuk membuat entry AuditLog dengan Blockchain Hash Chain."""
+def _current_user():
     user = get_current_user()
     # Skip jika user belum login (misal saat migrate/loaddata)
     if user is None or not hasattr(user, 'pk') or user.is_anonymous:
-        user = None
+        return None
+    return user
+
+
+def _build_log(action, instance, changes, user):
+    """AuditLog belum tersimpan (tanpa block_index / hash; timestamp = saat event)."""
+    return AuditLog(
+        user=user,
+        model_name=instance.__class__.__name__,
+        object_id=str(instance.pk),
+        object_repr=str(instance)[:255],
+        action=action,
+        changes=changes or {},
+        ip_address=get_current_ip(),
+    )
+
+
+# Statistik append per proses (lihat get_statistik_chain)
+_statistik_chain = {'append': 0, 'blok': 0, 'tunggu_lock_ms': 0.0, 'tunggu_lock_maks_ms': 0.0, 'fork': 0}
+
+
+def _kunci_chain_head():
+    """
+    Kunci baris AuditChainHead (pk=1) untuk mencegah race condition (agar index
+    & hash tidak tabrakan). Cukup satu baris yang dikunci — tidak perlu scan
+    urutan AuditLog. Kalau baris belum ada (DB baru / tabel dikosongkan),
+    inisialisasi dari blok terakhir.
+    """
+    mulai = time.perf_counter()
+    head = AuditChainHead.objects.select_for_update().filter(pk=1).first()
+    if head is None:
+        last = AuditLog.objects.order_by('-block_index').values('block_index', 'block_hash').first()
+        AuditChainHead.objects.get_or_create(pk=1, defaults={
+            'block_index': last['block_index'] if last else 0,
+            'block_hash': (last['block_hash'] if last else None) or "0" * 64,
+        })
+        head = AuditChainHead.objects.select_for_update().get(pk=1)
+    tunggu = (time.perf_counter() - mulai) * 1000
+    _statistik_chain['append'] += 1
+    _statistik_chain['tunggu_lock_ms'] += tunggu
+    _statistik_chain['tunggu_lock_maks_ms'] = max(_statistik_chain['tunggu_lock_maks_ms'], tunggu)
+    return head
+
+
+def _simpan_blok(head, logs):
+    """
+    INSERT blok yang sudah di-hash lalu majukan chain head.
+    IntegrityError pada block_index = chain bercabang (fork) → dicatat & dilempar.
+    """
+    try:
+        if len(logs) == 1:
+            logs[0].save(force_insert=True)
+        else:
+            AuditLog.objects.bulk_create(logs, batch_size=500)
+    except IntegrityError:
+        _statistik_chain['fork'] += 1
+        raise
+    head.block_index = logs[-1].block_index
+    head.block_hash = logs[-1].block_hash
+    head.save(update_fields=['block_index', 'block_hash', 'updated_at'])
+    _statistik_chain['blok'] += len(logs)
+
+
+def get_statistik_chain():
+    """Statistik append audit (jumlah, waktu tunggu lock, fork) di proses ini."""
+    stats = dict(_statistik_chain)
+    stats['tunggu_lock_rata_ms'] = round(stats['tunggu_lock_ms'] / stats['append'], 3) if stats['append'] else 0.0
+    stats['tunggu_lock_ms'] = round(stats['tunggu_lock_ms'], 3)
+    stats['tunggu_lock_maks_ms'] = round(stats['tunggu_lock_maks_ms'], 3)
+    head = AuditChainHead.objects.filter(pk=1).values('block_index', 'block_hash').first()
+    stats['head'] = head
+    stats['outbox_pending'] = AuditOutbox.objects.count()
+    return stats
+
+
+# ============================================================
+# MODE ASYNC: event audit → AuditOutbox → worker → hash chain
+# ============================================================
+
+def _audit_async():
+    """settings.AUDIT_ASYNC = True → event audit masuk outbox, bukan langsung ke chain."""
+    return getattr(settings, 'AUDIT_ASYNC', False)
+
 
-    from django.db import transaction
+def _ke_outbox(logs):
+    """
+    Simpan event (AuditLog belum ber-hash) ke outbox di transaksi yang sedang berjalan.
+
+    Model finance memakai AuditOutboxAtomikMixin sehingga save() + outbox selalu
+    satu transaksi. Untuk model pihak ketiga (auth.User) jaminan yang sama hanya
+    berlaku jika pemanggil membuka transaction.atomic() (atau ATOMIC_REQUESTS).
+    Worker hanya melihat baris outbox yang sudah commit, jadi tidak perlu
+    on_commit untuk memicu pengosongan.
+    """
+    AuditOutbox.objects.bulk_create([
+        AuditOutbox(
+            user_id=log.user_id, model_name=log.model_name, object_id=log.object_id,
+            object_repr=log.object_repr, action=log.action, changes=log.changes,
+            ip_address=log.ip_address, timestamp=log.timestamp,
+        )
+        for log in logs
+    ], batch_size=500)
+
+
+def drain_audit_outbox(batch_size=500):
+    """
+    Pindahkan isi outbox ke hash chain sesuai urutan id, per batch.
+    Append ke chain dan hapus dari outbox ada di transaksi yang sama,
+    sehingga tiap event masuk chain tepat sekali. Return jumlah event diproses.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(AuditOutbox.objects.select_for_update().order_by('id')[:batch_size])
+            if not rows:
+                return total
+            _tulis_ke_chain([
+                AuditLog(
+                    user_id=row.user_id, model_name=row.model_name, object_id=row.object_id,
+                    object_repr=row.object_repr, action=row.action, changes=row.changes,
+                    ip_address=row.ip_address, timestamp=row.timestamp,
+                )
+                for row in rows
+            ])
+            AuditOutbox.objects.filter(id__in=[row.id for row in rows]).delete()
+        total += len(rows)
+
+
+# Batch aktif per thread (list AuditLog yang menunggu di-append), None = tidak ada batch
+_batch_state = threading.local()
+
+
+@contextmanager
+def audit_batch():
+    """
+    Kumpulkan semua event audit di dalam blok lalu tulis ke hash chain
+    SEKALIGUS di akhir blok (satu lock, satu bulk INSERT, hash berurutan),
+    bukan satu lock + INSERT + UPDATE per save. Blok dijalankan di dalam
+    transaksi sehingga data & audit log tetap commit/rollback bersama.
+
+        with audit_batch():
+            for obj in objs:
+                obj.save()
+
+    Batch bersarang ikut ke batch terluar.
+    """
+    if getattr(_batch_state, 'logs', None) is not None:
+        yield
+        return
+
+    _batch_state.logs = []
+    try:
+        with transaction.atomic():
+            yield
+            logs, _batch_state.logs = _batch_state.logs, None
+            _append_logs(logs)
+    finally:
+        _batch_state.logs = None
+
+
+def _create_log(action, instance, changes=None):
+    """Helper untuk membuat entry AuditLog dengan Blockchain Hash Chain."""
     from .blockchain import calculate_block_hash
+
+    batch = getattr(_batch_state, 'logs', None)
+    if batch is not None:
+        # Di dalam audit_batch(): snapshot sekarang (pk/repr), tulis di akhir batch
+        batch.append(_build_log(action, instance, changes, _current_user()))
+        return
     
+    log = _build_log(action, instance, changes, _current_user())
+    if _audit_async():
+        _ke_outbox([log])
+        return
+
     with transaction.atomic():
-        # Lock tabel AuditLog untuk mencegah race condition (agar index & hash tidak tabrakan)
-        # select_for_update() hanya berjalan kalau ada objek. Kalau kosong tidak bisa.
-        last_block = AuditLog.objects.select_for_update().order_by('-block_index', '-id').first()
+        head = _kunci_chain_head()
+        log.block_index = head.block_index + 1
+        log.previous_hash = head.block_hash
         
-        if last_block:
-            new_index = last_block.block_index + 1
-            # pastikan last_block punya block_hash, jika belum ada kasih default
-            prev_hash = last_block.block_hash if last_block.block_hash else "0" * 64
-        else:
-            new_index = 1
-            prev_hash = "0" * 64
-
-        log = AuditLog(
-            block_index=new_index,
-            previous_hash=prev_hash,
-            user=user,
-            model_name=instance.__class__.__name__,
-            object_id=str(instance.pk),
-            object_repr=str(instance)[:255],
-            action=action,
-            changes=changes or {},
-            ip_address=get_current_ip(),
-        )
-        
-        # Simpan log ke DB untuk men-generate `timestamp` (auto_now_add) dan `id`
-        log.save()
-        
-        # Setelah ada timestamp, hitung hash
+        # timestamp sudah terisi (default=timezone.now) → hash dihitung sebelum
+        # INSERT, sehingga blok cukup ditulis sekali
         log.block_hash = calculate_block_hash(log)
-        
-        # Update ulang hash
-        log.save(update_fields=['block_hash'])
+        _simpan_blok(head, [log])
+
+
+def catat_audit(action, instance, changes=None):
+    """
+    Catat satu event audit secara manual (misal untuk queryset.update() yang
+    tidak memicu signal). Ikut audit_batch() jika sedang aktif.
+    """
+    _create_log(action, instance, changes)
+
+
+def append_audit_logs(entries):
+    """
+    Tambahkan banyak blok sekaligus ke hash chain.
+
+    Args:
+        entries: iterable (action, instance, changes).
+    Returns:
+        list AuditLog yang sudah tersimpan.
+    """
+    user = _current_user()
+    logs = [_build_log(action, instance, changes, user) for action, instance, changes in entries]
+    batch = getattr(_batch_state, 'logs', None)
+    if batch is not None:
+        batch.extend(logs)
+        return logs
+    return _append_logs(logs)
+
+
+def _append_logs(logs):
+    """Tulis blok ke chain (atau ke outbox jika AUDIT_ASYNC aktif)."""
+    if not logs:
+        return logs
+    if _audit_async():
+        _ke_outbox(logs)
+        return logs
+    return _tulis_ke_chain(logs)
+
+
+def _tulis_ke_chain(logs):
+    """
+    Satu lock pada chain head, hash dihitung berurutan di Python,
+    lalu satu bulk INSERT.
+    """
+    from .blockchain import calculate_block_hash
+
+    with transaction.atomic():
+        head = _kunci_chain_head()
+        prev_hash = head.block_hash
+        for i, log in enumerate(logs, start=head.block_index + 1):
+            log.block_index = i
+            log.previous_hash = prev_hash
+            log.block_hash = calculate_block_hash(log)
+            prev_hash = log.block_hash
+        _simpan_blok(head, logs)
+    return logs
+
+
+def audit_bulk_create(instances):
+    """Catat log CREATE untuk objek hasil bulk_create (yang tidak memicu signal)."""
+    return append_audit_logs(
+        ('CREATE', instance, _get_all_fields(instance)) for instance in instances
+    )
 
 
 # ============================================================
@@ -107,6 +304,69 @@ AUDITED_MODELS = [
 ]
 
 
+# ============================================================
+# POST_INIT: Catat nilai field saat instance dibuat / dimuat dari DB
+# ============================================================
+
+def _snapshot(instance):
+    """Nilai mentah (attname) field yang sudah dimuat — field deferred tidak ikut."""
+    data = instance.__dict__
+    return {
+        f.attname: copy.deepcopy(data[f.attname]) if isinstance(data[f.attname], (dict, list)) else data[f.attname]
+        for f in instance._meta.concrete_fields if f.attname in data
+    }
+
+
+# Model milik app ini (AuditSnapshotMixin) — auth.User tidak diberi snapshot
+# (tidak di-patch): UPDATE User mengambil state lama dari DB di pre_save
+SNAPSHOT_MODELS = [m for m in AUDITED_MODELS if issubclass(m, AuditSnapshotMixin)]
+
+
+def audit_post_init(sender, instance, **kwargs):
+    """Snapshot nilai awal instance agar diff UPDATE tidak perlu query ulang."""
+    instance._audit_snapshot = _snapshot(instance)
+
+
+# Dihubungkan per sender: receiver tanpa sender berjalan untuk SETIAP instance
+# model apa pun (setiap baris setiap queryset) hanya untuk di-filter
+for _model in SNAPSHOT_MODELS:
+    post_init.connect(audit_post_init, sender=_model, dispatch_uid=f'audit_post_init_{_model._meta.label_lower}')
+
+
+def segarkan_snapshot(instance, fields=None):
+    """
+    Field yang baru dimuat ulang dari DB → nilainya jadi pembanding baru di
+    snapshot. Dipanggil AuditSnapshotMixin.refresh_from_db().
+    """
+    snapshot = getattr(instance, '_audit_snapshot', None)
+    if snapshot is None or fields is None:
+        instance._audit_snapshot = _snapshot(instance)
+        return
+    tersimpan = _snapshot(instance)
+    for name in fields:
+        try:
+            attname = instance._meta.get_field(name).attname
+        except FieldDoesNotExist:
+            continue  # nama prefetch / relasi balik, bukan kolom
+        if attname in tersimpan:
+            snapshot[attname] = tersimpan[attname]
+
+
+def _old_from_snapshot(sender, instance):
+    """
+    Bangun instance "lama" dari snapshot tanpa query. None jika snapshot tidak
+    bisa dipercaya: instance belum pernah dimuat/disimpan (dibuat manual dengan pk)
+    atau ada field deferred (.only()/.defer()).
+    """
+    snapshot = getattr(instance, '_audit_snapshot', None)
+    if snapshot is None or instance._state.adding:
+        return None
+    fields = sender._meta.concrete_fields
+    if len(snapshot) != len(fields):
+        return None
+    return sender.from_db(instance._state.db, [f.attname for f in fields], [snapshot[f.attname] for f in fields])
+
+
 # ============================================================
 # PRE_SAVE: Simpan snapshot data lama ke instance._old_instance
 # ============================================================
@@ -117,10 +377,13 @@ def audit_pre_save(sender, instance, **kwargs):
     if sender not in AUDITED_MODELS:
         return
     if instance.pk:
-        try:
-            instance._old_instance = sender.objects.get(pk=instance.pk)
-        except sender.DoesNotExist:
-            instance._old_instance = None
+        instance._old_instance = _old_from_snapshot(sender, instance)
+        if instance._old_instance is None:
+            # Fallback: instance tidak berasal dari DB → ambil state lama dari DB
+            try:
+                instance._old_instance = sender.objects.get(pk=instance.pk)
+            except sender.DoesNotExist:
+                instance._old_instance = None
     else:
         instance._old_instance = None
 
@@ -136,13 +399,26 @@ def audit_post_save(sender, instance, created, **kwargs):
         return
 
     if created:
-        _create_log('CREATE', instance, {'data': _get_all_fields(instance)})
+        _create_log('CREATE', instance, _get_all_fields(instance))
     else:
         old = getattr(instance, '_old_instance', None)
         if old:
             changes = _get_field_changes(instance, old)
             if changes:  # Hanya log jika ada perubahan nyata
                 _create_log('UPDATE', instance, changes)
+    # State tersimpan sekarang jadi pembanding untuk save berikutnya
+    # (save(update_fields=...) hanya menulis sebagian field)
+    if sender not in SNAPSHOT_MODELS:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and getattr(instance, '_audit_snapshot', None) is not None:
+        tersimpan = _snapshot(instance)
+        for name in update_fields:
+            attname = instance._meta.get_field(name).attname
+            if attname in tersimpan:
+                instance._audit_snapshot[attname] = tersimpan[attname]
+    else:
+        instance._audit_snapshot = _snapshot(instance)
 
 
 # ============================================================
@@ -154,4 +430,4 @@ def audit_post_delete(sender, instance, **kwargs):
     """Catat aksi DELETE ke AuditLog."""
     if sender not in AUDITED_MODELS:
         return
-    _create_log('DELETE', instance, {'data_terhapus': _get_all_fields(instance)})
+    _create_log('DELETE', instance, changes_delete(instance))
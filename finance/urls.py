@@ -4,11 +4,14 @@ from . import views
 urlpatterns = [
     path('', views.custom_login_redirect, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('api/dashboard-cache/', views.api_dashboard_cache_stats, name='api_dashboard_cache_stats'),
     path('jurnal/', views.jurnal_list, name='jurnal_list'),
     path('jurnal/edit/<int:pk>/', views.jurnal_edit, name='jurnal_edit'),
     path('jurnal/delete/<int:pk>/', views.jurnal_delete, name='jurnal_delete'),
     path('buku-besar/', views.buku_besar, name='buku_besar'),
+    path('buku-besar/export/', views.export_buku_besar, name='export_buku_besar'),
     path('laporan/', views.laporan_keuangan, name='laporan_keuangan'),
+    path('laporan/tutup-buku/', views.laporan_tutup_buku, name='laporan_tutup_buku'),
     
     # Master Data Akun
     path('akun/', views.akun_list, name='akun_list'),
@@ -85,6 +88,9 @@ urlpatterns = [
     path('ops/outbound/edit/<int:pk>/', views.ops_outbound_edit, name='ops_outbound_edit'),
     path('ops/outbound/hapus/<int:pk>/', views.ops_outbound_delete, name='ops_outbound_delete'),
 
+    # --- IMPORT CSV OPERASIONAL ---
+    path('ops/import/', views.ops_import_csv, name='ops_import_csv'),
+
     # --- EXPORT DATA OPERASIONAL ---
     path('ops/export/inbound/', views.export_ops_inbound_excel, name='export_ops_inbound'),
     path('ops/export/manifest/', views.export_ops_manifest_excel, name='export_ops_manifest'),
@@ -102,7 +108,10 @@ urlpatterns = [
     path('audit-log/', views.audit_log_list, name='audit_log'),
     path('audit-log/blockchain/', views.blockchain_explorer, name='blockchain_explorer'),
     path('audit-log/verify/', views.verify_blockchain, name='verify_blockchain'),
+    path('audit-log/verify-range/', views.api_verify_range, name='api_verify_range'),
+    path('audit-log/proof/<int:block_index>/', views.api_audit_proof, name='api_audit_proof'),
     path('audit-log/backup/', views.backup_blockchain, name='backup_blockchain'),
+    path('api/audit-chain/', views.api_audit_chain_stats, name='api_audit_chain_stats'),
 
     # --- EKSPOR LAPORAN (Khusus Owner) ---
     path('laporan/export/excel/', views.export_laporan_excel, name='export_excel'),
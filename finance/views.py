@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from .decorators import owner_required, admin_or_owner_required
-from django.db.models import Sum, Q, F, Value, DecimalField
+from django.db.models import Sum, Q, Value, DecimalField
 from django.db.models.functions import Coalesce
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -11,8 +12,15 @@ from decimal import Decimal
 from io import BytesIO
 from openpyxl.utils import get_column_letter
 
-from .models import Akun, Jurnal, InboundTransaction, OutboundTransaction, Manifest, KasHarian, InvoiceTagihan
+from .models import Akun, Jurnal, InboundTransaction, OutboundTransaction, Manifest, KasHarian, InvoiceTagihan, TutupBuku
 from .forms import JurnalForm
+from .dashboard_cache import get_ringkasan_dashboard, get_statistik_cache
+from .signals import audit_batch, catat_audit
+from .audit_policy import format_update
+from .saldo import (
+    get_mutasi_semua_akun, get_saldo_kumulatif, saldo_akun, saldo_normal,
+    tutup_buku_periode, halaman_buku_besar, get_saldo_awal_buku_besar, iter_buku_besar, SEMUA,
+)
 
 @login_required
 def custom_login_redirect(request):
@@ -33,7 +41,10 @@ def custom_login_redirect(request):
     return redirect('dashboard_ops')
 
 def get_saldo_akun(akun, start_date=None, end_date=None):
-    """Helper to calculate account balance."""
+    """
+    Helper to calculate account balance (satu akun, 2 query).
+    Untuk laporan banyak akun gunakan finance.saldo.get_mutasi_semua_akun().
+    """
     debit_filter = Q(akun_debit=akun)
     credit_filter = Q(akun_kredit=akun)
     
@@ -56,76 +67,101 @@ def get_saldo_akun(akun, start_date=None, end_date=None):
     else:
         return credit - debit
 
-@login_required
-@owner_required
-def dashboard(request):
-    # Summary Cards
-    total_aset = 0
-    for akun in Akun.objects.filter(kategori='ASSET'):
-        total_aset += get_saldo_akun(akun)
-        
-    total_pendapatan = 0
-    for akun in Akun.objects.filter(kategori='REVENUE'):
-        total_pendapatan += get_saldo_akun(akun)
-        
-    total_beban = 0
-    for akun in Akun.objects.filter(kategori='EXPENSE'):
-        total_beban += get_saldo_akun(akun)
-        
-    # Perhitungan Pajak 2% (sinkron dengan laporan)
-    pajak_2_persen = int(total_pendapatan * Decimal('0.02'))
-    laba_bersih = total_pendapatan - pajak_2_persen - total_beban
-    
-    # Recent Jurnal
-    recent_jurnal = Jurnal.objects.all().order_by('-tanggal', '-created_at')[:5]
-    
-    # Tren Bulanan (Last 6 Months) untuk Grafik Analytics
+def _hitung_ringkasan_dashboard(today):
+    """
+    Hitung kartu ringkasan + tren 6 bulan untuk dashboard Owner.
+    Hasilnya di-cache oleh finance.dashboard_cache (lihat view dashboard).
+    """
     from datetime import date
     import calendar
-    import json
-    
-    today = timezone.now().date()
-    months_data = []
+
     bulan_names = {
         1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr', 5: 'Mei', 6: 'Jun',
         7: 'Jul', 8: 'Ags', 9: 'Sep', 10: 'Okt', 11: 'Nov', 12: 'Des'
     }
-    
+
+    # Periode: total keseluruhan + 6 bulan terakhir (untuk grafik tren)
+    periode = {SEMUA: (None, None)}
+    bulan_tren = []
     for i in range(5, -1, -1):
         m = today.month - i
         y = today.year
         while m <= 0:
             m += 12
             y -= 1
-            
-        start_dt = date(y, m, 1)
+
+        key = f"{y}-{m:02d}"
         last_day = calendar.monthrange(y, m)[1]
-        end_dt = date(y, m, last_day)
-        
-        rev = 0
-        for a in Akun.objects.filter(kategori='REVENUE'):
-            rev += get_saldo_akun(a, start_dt, end_dt)
-            
-        exp = 0
-        for a in Akun.objects.filter(kategori='EXPENSE'):
-            exp += get_saldo_akun(a, start_dt, end_dt)
-            
+        periode[key] = (date(y, m, 1), date(y, m, last_day))
+        bulan_tren.append((key, y, m))
+
+    # Satu query untuk semua akun × semua periode
+    mutasi = get_mutasi_semua_akun(periode)
+    akun_list = list(Akun.objects.all())
+
+    def total_kategori(kategori, key=SEMUA):
+        return sum(
+            (saldo_akun(a, mutasi, key) for a in akun_list if a.kategori == kategori),
+            Decimal('0')
+        )
+
+    # Summary Cards
+    total_aset = total_kategori('ASSET')
+    total_pendapatan = total_kategori('REVENUE')
+    total_beban = total_kategori('EXPENSE')
+
+    # Perhitungan Pajak 2% (sinkron dengan laporan)
+    pajak_2_persen = int(total_pendapatan * Decimal('0.02'))
+    laba_bersih = total_pendapatan - pajak_2_persen - total_beban
+
+    # Tren Bulanan (Last 6 Months) untuk Grafik Analytics
+    months_data = []
+    for key, y, m in bulan_tren:
         months_data.append({
             'label': f"{bulan_names.get(m, '')} {y}",
-            'pendapatan': float(rev),
-            'beban': float(exp)
+            'pendapatan': float(total_kategori('REVENUE', key)),
+            'beban': float(total_kategori('EXPENSE', key))
         })
-        
-    context = {
+
+    return {
         'total_aset': total_aset,
         'total_pendapatan': total_pendapatan,
         'total_beban': total_beban,
         'laba_bersih': laba_bersih,
+        'months_data': months_data,
+    }
+
+@login_required
+@owner_required
+def dashboard(request):
+    import json
+
+    today = timezone.now().date()
+    # Cache per periode (bulan berjalan) — invalidasi otomatis saat Jurnal/Akun berubah
+    ringkasan = get_ringkasan_dashboard(
+        f"{today:%Y-%m}", lambda: _hitung_ringkasan_dashboard(today)
+    )
+    
+    # Recent Jurnal
+    recent_jurnal = Jurnal.objects.all().order_by('-tanggal', '-created_at')[:5]
+        
+    context = {
+        'total_aset': ringkasan['total_aset'],
+        'total_pendapatan': ringkasan['total_pendapatan'],
+        'total_beban': ringkasan['total_beban'],
+        'laba_bersih': ringkasan['laba_bersih'],
         'recent_jurnal': recent_jurnal,
-        'trends_json': json.dumps(months_data),
+        'trends_json': json.dumps(ringkasan['months_data']),
     }
     return render(request, 'finance/dashboard.html', context)
 
+@login_required
+@owner_required
+def api_dashboard_cache_stats(request):
+    """API endpoint (JSON): statistik hit/miss cache ringkasan dashboard."""
+    from django.http import JsonResponse
+    return JsonResponse(get_statistik_cache())
+
 @login_required
 @owner_required
 def jurnal_list(request):
@@ -218,72 +254,113 @@ def jurnal_edit(request, pk):
         form = JurnalForm(instance=jurnal)
     return render(request, 'finance/akuntansi/jurnal_edit.html', {'form': form, 'jurnal': jurnal})
 
+def _tanggal_param(request, name):
+    """Ambil parameter GET tanggal (YYYY-MM-DD); None jika kosong/tidak valid."""
+    from django.utils.dateparse import parse_date
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+
 @login_required
 @owner_required
 def buku_besar(request):
     akun_id = request.GET.get('akun')
+    dari = _tanggal_param(request, 'dari')
+    sampai = _tanggal_param(request, 'sampai')
     selected_akun = None
-    transaksi = []
+    page_obj = None
+    saldo_awal = Decimal('0')
     
     if akun_id:
         selected_akun = get_object_or_404(Akun, id=akun_id)
-        # Get all transactions involving this account
-        debits = Jurnal.objects.filter(akun_debit=selected_akun).annotate(
-            posisi=F('nominal'), # Debit amount
-            lawan=F('akun_kredit__nama')
+        # Keyset pagination 50 baris per halaman, saldo awal dari SaldoBulanan
+        page_obj, saldo_awal = halaman_buku_besar(
+            selected_akun, request.GET.get('setelah'), request.GET.get('sebelum'),
+            per_page=50, start_date=dari, end_date=sampai
         )
-        credits = Jurnal.objects.filter(akun_kredit=selected_akun).annotate(
-            posisi=F('nominal'), # Credit amount
-            lawan=F('akun_debit__nama')
-        )
-        
-        # Combine manually
-        all_events = []
-        for d in debits:
-            all_events.append({
-                'tanggal': d.tanggal,
-                'uraian': d.uraian,
-                'lawan': d.akun_kredit.nama, # Account on the other side
-                'debit': d.nominal,
-                'kredit': 0
-            })
-        for c in credits:
-            all_events.append({
-                'tanggal': c.tanggal,
-                'uraian': c.uraian,
-                'lawan': c.akun_debit.nama,
-                'debit': 0,
-                'kredit': c.nominal
-            })
-            
-        # Sort by date
-        all_events.sort(key=lambda x: x['tanggal'])
-        
-        # Calculate running balance
-        saldo = 0
-        for event in all_events:
-            if selected_akun.saldo_normal == 'DEBIT':
-                saldo += event['debit']
-                saldo -= event['kredit']
-            else:
-                saldo += event['kredit']
-                saldo -= event['debit']
-            event['saldo'] = saldo
-            
-        transaksi = all_events
 
     context = {
         'daftar_akun': Akun.objects.all(),
         'selected_akun': selected_akun,
-        'transaksi': transaksi
+        'transaksi': page_obj.object_list if page_obj else [],
+        'page_obj': page_obj,
+        'saldo_awal': saldo_awal,
+        'dari': dari,
+        'sampai': sampai,
     }
     return render(request, 'finance/akuntansi/buku_besar.html', context)
 
+
+class _Echo:
+    """File-like minimal untuk csv.writer: write() langsung mengembalikan baris."""
+    def write(self, value):
+        return value
+
+
+@login_required
+@owner_required
+def export_buku_besar(request):
+    """
+    Ekspor buku besar satu akun (opsional rentang tanggal) ke CSV atau XLSX.
+    CSV di-stream baris per baris (StreamingHttpResponse); XLSX ditulis dengan
+    openpyxl write-only ke file sementara lalu dikirim dengan FileResponse.
+    Memori tetap datar walau ratusan ribu baris.
+    """
+    import csv
+    import tempfile
+    from django.http import StreamingHttpResponse, FileResponse
+
+    akun = get_object_or_404(Akun, id=request.GET.get('akun'))
+    dari = _tanggal_param(request, 'dari')
+    sampai = _tanggal_param(request, 'sampai')
+    fmt = request.GET.get('format', 'csv')
+
+    periode = f"{dari or 'awal'}_sd_{sampai or 'akhir'}"
+    filename = f"Buku_Besar_{akun.kode}_{periode}"
+    header = ['Tanggal', 'Uraian', 'Lawan Akun', 'Debit', 'Kredit', 'Saldo']
+    saldo_awal = get_saldo_awal_buku_besar(akun, dari)
+
+    def baris():
+        yield ['', 'Saldo Awal', '', '', '', saldo_awal]
+        for row in iter_buku_besar(akun, dari, sampai):
+            yield [row['tanggal'], row['uraian'], row['lawan'], row['debit'], row['kredit'], row['saldo']]
+
+    if fmt == 'xlsx':
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=f"Buku Besar {akun.kode}")
+        ws.append([f"BUKU BESAR — {akun.kode} {akun.nama}"])
+        ws.append(header)
+        for values in baris():
+            ws.append(values)
+
+        tmp = tempfile.TemporaryFile()
+        wb.save(tmp)
+        tmp.seek(0)
+        return FileResponse(
+            tmp, as_attachment=True, filename=f"{filename}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield writer.writerow(header)
+        for values in baris():
+            yield writer.writerow(values)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
 @login_required
 @owner_required
 def laporan_keuangan(request):
     import calendar
-    from datetime import date
+    from datetime import date, timedelta
 
     # Filter parameter
     bulan = request.GET.get('bulan')
@@ -299,19 +376,27 @@ def laporan_keuangan(request):
         last_day = calendar.monthrange(tahun, bulan)[1]
         end_date = date(tahun, bulan, last_day)
 
+    # Mutasi seluruh akun untuk periode ini (satu query)
+    mutasi = get_mutasi_semua_akun({SEMUA: (start_date, end_date)})
+    akun_list = list(Akun.objects.all().order_by('kode'))
+
     # Laba Rugi
     pendapatan = []
     total_pendapatan = 0
-    for a in Akun.objects.filter(kategori='REVENUE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'REVENUE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             pendapatan.append({'nama': a.nama, 'nominal': s})
             total_pendapatan += s
             
     beban = []
     total_beban = 0
-    for a in Akun.objects.filter(kategori='EXPENSE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'EXPENSE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             beban.append({'nama': a.nama, 'nominal': s})
             total_beban += s
@@ -326,19 +411,37 @@ def laporan_keuangan(request):
     # Laba Bersih = Laba Kotor - Total Beban - Biaya Pajak
     laba_rugi = laba_kotor - total_beban - biaya_pajak
     
-    # Neraca (Balance Sheet)
+    # Neraca (Balance Sheet) — saldo kumulatif s/d akhir periode,
+    # dihitung dari checkpoint Tutup Buku terakhir + mutasi sesudahnya
+    laba_ditahan = 0
+    if start_date:
+        kumulatif = get_saldo_kumulatif(end_date)
+        # Laba periode-periode sebelumnya (Saldo Laba Ditahan)
+        kumulatif_lalu = get_saldo_kumulatif(start_date - timedelta(days=1))
+        for a in akun_list:
+            if a.kategori == 'REVENUE':
+                laba_ditahan += saldo_normal(a, kumulatif_lalu.get(a.id))
+            elif a.kategori == 'EXPENSE':
+                laba_ditahan -= saldo_normal(a, kumulatif_lalu.get(a.id))
+    else:
+        kumulatif = {akun_id: data[SEMUA] for akun_id, data in mutasi.items()}
+
     aset = []
     total_aset = 0
-    for a in Akun.objects.filter(kategori='ASSET'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'ASSET':
+            continue
+        s = saldo_normal(a, kumulatif.get(a.id))
         if s != 0:
             aset.append({'nama': a.nama, 'nominal': s})
             total_aset += s
             
     kewajiban = []
     total_kewajiban = 0
-    for a in Akun.objects.filter(kategori='LIABILITY'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'LIABILITY':
+            continue
+        s = saldo_normal(a, kumulatif.get(a.id))
         if s != 0:
             kewajiban.append({'nama': a.nama, 'nominal': s})
             total_kewajiban += s
@@ -346,13 +449,15 @@ def laporan_keuangan(request):
     modal_items = [] # Avoid Variable Clash
     total_modal_awal = 0
     
-    for a in Akun.objects.filter(kategori='EQUITY'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'EQUITY':
+            continue
+        s = saldo_normal(a, kumulatif.get(a.id))
         modal_items.append({'nama': a.nama, 'nominal': s})
         total_modal_awal += s
         
-    # Saldo Laba (Retained Earnings) = Laba Rugi
-    total_ekuitas = total_modal_awal + laba_rugi
+    # Saldo Laba (Retained Earnings) = Laba Ditahan + Laba Rugi Berjalan
+    total_ekuitas = total_modal_awal + laba_ditahan + laba_rugi
     
     # Checks
     balance_check = total_aset - (total_kewajiban + total_ekuitas)
@@ -362,8 +467,8 @@ def laporan_keuangan(request):
     total_ns_debit = 0
     total_ns_kredit = 0
     
-    for a in Akun.objects.all().order_by('kode'):
-        saldo = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        saldo = saldo_akun(a, mutasi)
         if saldo != 0:
             ns_debit = 0
             ns_kredit = 0
@@ -427,6 +532,10 @@ def laporan_keuangan(request):
     current_year = date.today().year
     years = range(current_year - 5, current_year + 1)
 
+    periode_tutup = None
+    if start_date:
+        periode_tutup = TutupBuku.objects.filter(tahun=tahun, bulan=bulan).select_related('ditutup_oleh').first()
+
     context = {
         # Periode
         'selected_bulan': str(bulan) if bulan else '',
@@ -441,6 +550,7 @@ def laporan_keuangan(request):
         'aset': aset, 'total_aset': total_aset,
         'kewajiban': kewajiban, 'total_kewajiban': total_kewajiban,
         'modal': modal_items, 'total_modal': total_modal_awal, 'total_ekuitas': total_ekuitas,
+        'laba_ditahan': laba_ditahan, 'periode_tutup': periode_tutup,
         'balance_check': balance_check,
         'neraca_saldo': neraca_saldo, 'total_ns_debit': total_ns_debit, 'total_ns_kredit': total_ns_kredit,
         'arus_kas_masuk': arus_kas_masuk, 'arus_kas_keluar': arus_kas_keluar,
@@ -449,6 +559,26 @@ def laporan_keuangan(request):
     }
     return render(request, 'finance/laporan.html', context)
 
+@login_required
+@owner_required
+def laporan_tutup_buku(request):
+    """Tutup buku bulan terpilih: simpan checkpoint saldo kumulatif per akhir bulan."""
+    if request.method != 'POST':
+        return redirect('laporan_keuangan')
+
+    try:
+        bulan = int(request.POST.get('bulan'))
+        tahun = int(request.POST.get('tahun'))
+        if not 1 <= bulan <= 12:
+            raise ValueError
+    except (TypeError, ValueError):
+        messages.error(request, 'Pilih bulan dan tahun yang valid untuk tutup buku.')
+        return redirect('laporan_keuangan')
+
+    tutup_buku_periode(tahun, bulan, user=request.user)
+    messages.success(request, f'Tutup buku periode {bulan}/{tahun} berhasil. Saldo akhir bulan disimpan sebagai checkpoint.')
+    return redirect(f"{reverse('laporan_keuangan')}?bulan={bulan}&tahun={tahun}")
+
 
 # --- Akun (Master Data) Views --- (Khusus Owner)
 from .forms import AkunForm
@@ -1181,15 +1311,19 @@ def tagihan_create(request):
             total = inbounds.aggregate(Sum('total_biaya'))['total_biaya__sum'] or 0
             
             try:
-                inv = InvoiceTagihan.objects.create(
-                    no_invoice=no_inv,
-                    customer=customer,
-                    jatuh_tempo=jatuh_tempo if jatuh_tempo else None,
-                    total=total
-                )
-                
-                # Update inbounds
-                inbounds.update(invoice=inv)
+                with audit_batch():
+                    inv = InvoiceTagihan.objects.create(
+                        no_invoice=no_inv,
+                        customer=customer,
+                        jatuh_tempo=jatuh_tempo if jatuh_tempo else None,
+                        total=total
+                    )
+                    
+                    # Update inbounds (queryset.update tidak memicu signal → catat audit manual)
+                    linked = list(inbounds)
+                    inbounds.update(invoice=inv)
+                    for item in linked:
+                        catat_audit('UPDATE', item, format_update({'invoice': (None, inv.pk)}))
                 
                 messages.success(request, f'Tagihan {no_inv} berhasil dibuat!')
                 return redirect('invoice_tagihan_print', pk=inv.pk)
@@ -1422,34 +1556,36 @@ def gaji_save_all(request):
         
         karyawan_ids = request.POST.getlist('karyawan_id')
         
-        for k_id in karyawan_ids:
-            k = Karyawan.objects.get(id=k_id)
+        # Satu transaksi; audit log seluruh karyawan ditulis sekaligus di akhir
+        with audit_batch():
+            for k_id in karyawan_ids:
+                k = Karyawan.objects.get(id=k_id)
             
-            # Get or Create
-            # Defaults penting saat create pertama kali jika belum ada di POST
-            gaji_obj, created = Penggajian.objects.get_or_create(
-                karyawan=k, bulan=bulan, tahun=tahun,
-                defaults={'gaji_pokok': k.gaji_pokok}
-            )
+                # Get or Create
+                # Defaults penting saat create pertama kali jika belum ada di POST
+                gaji_obj, created = Penggajian.objects.get_or_create(
+                    karyawan=k, bulan=bulan, tahun=tahun,
+                    defaults={'gaji_pokok': k.gaji_pokok}
+                )
             
-            # Update fields safely
-            # Note: Gaji Pokok juga disimpan jika user mengeditnya di view
-            raw_gaji_pokok = request.POST.get(f'gaji_pokok_{k_id}')
-            if raw_gaji_pokok is not None:
-                gaji_obj.gaji_pokok = parse_dec(raw_gaji_pokok)
+                # Update fields safely
+                # Note: Gaji Pokok juga disimpan jika user mengeditnya di view
+                raw_gaji_pokok = request.POST.get(f'gaji_pokok_{k_id}')
+                if raw_gaji_pokok is not None:
+                    gaji_obj.gaji_pokok = parse_dec(raw_gaji_pokok)
             
-            gaji_obj.lembur = parse_dec(request.POST.get(f'lembur_{k_id}'))
-            gaji_obj.bonus = parse_dec(request.POST.get(f'bonus_{k_id}')) # Add bonus since logic used it
+                gaji_obj.lembur = parse_dec(request.POST.get(f'lembur_{k_id}'))
+                gaji_obj.bonus = parse_dec(request.POST.get(f'bonus_{k_id}')) # Add bonus since logic used it
             
-            gaji_obj.potongan_cashbon = parse_dec(request.POST.get(f'potongan_cashbon_{k_id}'))
-            gaji_obj.potongan_absen = parse_dec(request.POST.get(f'potongan_absen_{k_id}'))
-            gaji_obj.potongan_bpjs = parse_dec(request.POST.get(f'potongan_bpjs_{k_id}'))
-            gaji_obj.potongan_lain = parse_dec(request.POST.get(f'potongan_lain_{k_id}'))
+                gaji_obj.potongan_cashbon = parse_dec(request.POST.get(f'potongan_cashbon_{k_id}'))
+                gaji_obj.potongan_absen = parse_dec(request.POST.get(f'potongan_absen_{k_id}'))
+                gaji_obj.potongan_bpjs = parse_dec(request.POST.get(f'potongan_bpjs_{k_id}'))
+                gaji_obj.potongan_lain = parse_dec(request.POST.get(f'potongan_lain_{k_id}'))
             
-            gaji_obj.catatan = request.POST.get(f'catatan_{k_id}', '')
+                gaji_obj.catatan = request.POST.get(f'catatan_{k_id}', '')
             
-            # Recalculate Total (logic inside save model)
-            gaji_obj.save()
+                # Recalculate Total (logic inside save model)
+                gaji_obj.save()
             
         messages.success(request, f'Data Gaji Bulan {bulan}/{tahun} berhasil disimpan.')
         return redirect(f'/gaji/?bulan={bulan}&tahun={tahun}')
@@ -1592,61 +1728,17 @@ def dashboard_ops(request):
 
 @login_required
 def ops_inbound_list(request):
+    """Daftar inbound baru + data lama, digabung & dipaginasi di SQL (lihat finance.ops_union)."""
     from django.utils import timezone
-    from .models import OpsInbound, InboundTransaction
+    from .ops_union import inbound_gabungan
     
     search = request.GET.get('q', '')
     bulan = request.GET.get('bulan')
     tahun = request.GET.get('tahun')
     status = request.GET.get('status', '').strip()
 
-    # Data Baru
-    items_new = OpsInbound.objects.all()
-    if search:
-        items_new = items_new.filter(
-            Q(nomor_resi__icontains=search) | Q(pengirim__icontains=search) | Q(penerima__icontains=search)
-        )
-    if bulan: items_new = items_new.filter(tanggal__month=int(bulan))
-    if tahun: items_new = items_new.filter(tanggal__year=int(tahun))
-    if status:
-        if status == 'LEGACY':
-            items_new = items_new.none()
-        else:
-            items_new = items_new.filter(status=status)
-
-    # Data Lama
-    items_legacy = InboundTransaction.objects.all()
-    if search:
-        items_legacy = items_legacy.filter(
-            Q(no_resi__icontains=search) | Q(vendor__icontains=search) | Q(tujuan__icontains=search)
-        )
-    if bulan: items_legacy = items_legacy.filter(tanggal_masuk_stt__month=int(bulan))
-    if tahun: items_legacy = items_legacy.filter(tanggal_masuk_stt__year=int(tahun))
-    if status:
-        if status == 'LEGACY':
-            pass
-        else:
-            items_legacy = items_legacy.none()
-
-    # Normalisasi
-    merged = []
-    for item in items_new:
-        merged.append({
-            'source': 'new', 'pk': item.pk, 'nomor_resi': item.nomor_resi, 'tanggal': item.tanggal,
-            'pengirim': item.pengirim, 'penerima': item.penerima, 'asal': item.asal, 'tujuan': item.tujuan,
-            'berat': item.berat, 'status_display': item.get_status_display(), 'status_raw': item.status
-        })
-    for item in items_legacy:
-        merged.append({
-            'source': 'legacy', 'pk': item.pk, 'nomor_resi': item.no_resi, 'tanggal': item.tanggal_masuk_stt,
-            'pengirim': item.vendor, 'penerima': '-', 'asal': '-', 'tujuan': item.tujuan,
-            'berat': item.kilo, 'status_display': 'Data Riwayat (Lama)', 'status_raw': 'LEGACY'
-        })
-    
-    merged.sort(key=lambda x: x['tanggal'] if x['tanggal'] else timezone.now().date(), reverse=True)
-    
     # Pagination
-    page_obj = _paginate(request, merged, per_page=20)
+    page_obj = _paginate(request, inbound_gabungan(search, bulan, tahun, status), per_page=20)
     years = range(timezone.now().year - 5, timezone.now().year + 2)
     
     return render(request, 'finance/inbound_list.html', {
@@ -1695,56 +1787,17 @@ def ops_inbound_delete(request, pk):
 
 @login_required
 def ops_manifest_list(request):
+    """Daftar manifest baru + data lama, digabung & dipaginasi di SQL (lihat finance.ops_union)."""
     from django.utils import timezone
-    from .models import OpsManifest, Manifest
+    from .ops_union import manifest_gabungan
     
     search = request.GET.get('q', '')
     bulan = request.GET.get('bulan')
     tahun = request.GET.get('tahun')
     status = request.GET.get('status', '').strip()
 
-    # Data Baru
-    items_new = OpsManifest.objects.all()
-    if search:
-        items_new = items_new.filter(Q(nomor_manifest__icontains=search) | Q(armada__icontains=search))
-    if bulan: items_new = items_new.filter(tanggal__month=int(bulan))
-    if tahun: items_new = items_new.filter(tanggal__year=int(tahun))
-    if status:
-        if status == 'LEGACY':
-            items_new = items_new.none()
-        else:
-            items_new = items_new.filter(status=status)
-
-    # Data Lama
-    items_legacy = Manifest.objects.all()
-    if search:
-        items_legacy = items_legacy.filter(Q(no_resi__icontains=search) | Q(pengirim__icontains=search))
-    if bulan: items_legacy = items_legacy.filter(tanggal_kirim__month=int(bulan))
-    if tahun: items_legacy = items_legacy.filter(tanggal_kirim__year=int(tahun))
-    if status:
-        if status == 'LEGACY':
-            pass
-        else:
-            items_legacy = items_legacy.none()
-
-    merged = []
-    for item in items_new:
-        merged.append({
-            'source': 'new', 'pk': item.pk, 'nomor_manifest': item.nomor_manifest, 'tanggal': item.tanggal,
-            'armada': item.armada, 'rute': item.rute, 'jumlah': item.jumlah_barang, 'berat': item.total_berat,
-            'status': item.status, 'status_display': item.get_status_display()
-        })
-    for item in items_legacy:
-        merged.append({
-            'source': 'legacy', 'pk': item.pk, 'nomor_manifest': item.no_resi, 'tanggal': item.tanggal_kirim,
-            'armada': item.penerima, 'rute': item.tujuan, 'jumlah': item.koli, 'berat': item.kg,
-            'status': 'LEGACY', 'status_display': 'Data Riwayat (Lama)'
-        })
-
-    merged.sort(key=lambda x: x['tanggal'] if x['tanggal'] else timezone.now().date(), reverse=True)
-    
     # Pagination
-    page_obj = _paginate(request, merged, per_page=20)
+    page_obj = _paginate(request, manifest_gabungan(search, bulan, tahun, status), per_page=20)
     years = range(timezone.now().year - 5, timezone.now().year + 2)
     
     return render(request, 'finance/manifest_list.html', {
@@ -1804,43 +1857,16 @@ def ops_manifest_delete(request, pk):
 
 @login_required
 def ops_outbound_list(request):
+    """Daftar outbound baru + data lama, digabung & dipaginasi di SQL (lihat finance.ops_union)."""
     from django.utils import timezone
-    from .models import OpsOutbound, OutboundTransaction
+    from .ops_union import outbound_gabungan
     
     search = request.GET.get('q', '')
     bulan = request.GET.get('bulan')
     tahun = request.GET.get('tahun')
 
-    # Data Baru
-    items_new = OpsOutbound.objects.select_related('inbound', 'manifest').all()
-    if search:
-        items_new = items_new.filter(Q(inbound__nomor_resi__icontains=search) | Q(manifest__nomor_manifest__icontains=search))
-    if bulan: items_new = items_new.filter(tanggal__month=int(bulan))
-    if tahun: items_new = items_new.filter(tanggal__year=int(tahun))
-
-    # Data Lama
-    items_legacy = OutboundTransaction.objects.all()
-    if search:
-        items_legacy = items_legacy.filter(Q(no_resi_bmm__icontains=search) | Q(pengirim__icontains=search))
-    if bulan: items_legacy = items_legacy.filter(tanggal__month=int(bulan))
-    if tahun: items_legacy = items_legacy.filter(tanggal__year=int(tahun))
-
-    merged = []
-    for item in items_new:
-        merged.append({
-            'source': 'new', 'pk': item.pk, 'nomor_resi_inbound': item.inbound.nomor_resi, 'tanggal': item.tanggal,
-            'nomor_manifest': item.manifest.nomor_manifest, 'rute': item.manifest.rute, 'catatan': item.catatan
-        })
-    for item in items_legacy:
-        merged.append({
-            'source': 'legacy', 'pk': item.pk, 'nomor_resi_inbound': item.no_resi_bmm, 'tanggal': item.tanggal,
-            'nomor_manifest': '-', 'rute': '-', 'catatan': f"Fatih: {item.pengirim}"
-        })
-
-    merged.sort(key=lambda x: x['tanggal'] if x['tanggal'] else timezone.now().date(), reverse=True)
-    
     # Pagination
-    page_obj = _paginate(request, merged, per_page=20)
+    page_obj = _paginate(request, outbound_gabungan(search, bulan, tahun), per_page=20)
     years = range(timezone.now().year - 5, timezone.now().year + 2)
     
     return render(request, 'finance/outbound_list.html', {
@@ -1888,6 +1914,46 @@ def ops_outbound_delete(request, pk):
     return redirect('ops_outbound_list')
 
 
+# ============================================================
+# IMPORT CSV OPERASIONAL (Inbound / Outbound / Manifest)
+# ============================================================
+
+@login_required
+@admin_or_owner_required
+def ops_import_csv(request):
+    """Upload CSV → import massal via finance.importer (bulk insert per batch)."""
+    from .forms import ImportCSVForm
+    from .importer import FileTidakValid, import_csv
+
+    hasil = None
+    if request.method == 'POST':
+        form = ImportCSVForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                hasil = import_csv(
+                    request.FILES['file'].file, form.cleaned_data['jenis'],
+                    dry_run=form.cleaned_data['dry_run'],
+                )
+            except FileTidakValid as e:
+                form.add_error('file', str(e))
+            except Exception as e:
+                messages.error(request, f"Import gagal: {e}")
+            else:
+                if form.cleaned_data['dry_run']:
+                    messages.info(request, f"Validasi selesai: {hasil['dibuat']} baris valid, {len(hasil['errors'])} bermasalah.")
+                elif hasil['dibuat']:
+                    messages.success(request, f"{hasil['dibuat']} baris berhasil diimport ({hasil['jurnal']} jurnal otomatis).")
+                else:
+                    messages.warning(request, 'Tidak ada baris yang diimport.')
+    else:
+        form = ImportCSVForm()
+    return render(request, 'finance/import_csv.html', {
+        'form': form,
+        'hasil': hasil,
+        'errors': hasil['errors'][:100] if hasil else [],
+    })
+
+
 # ============================================================
 # EXPORT DATA OPERASIONAL KE EXCEL
 # ============================================================
@@ -2569,18 +2635,25 @@ def export_laporan_excel(request):
     periode_text = f"Bulan {BULAN_NAMES.get(bulan, '')} {tahun}" if bulan and tahun else "Periode Berjalan"
 
     # ---- Hitung data ----
+    mutasi = get_mutasi_semua_akun({SEMUA: (start_date, end_date)})
+    akun_list = list(Akun.objects.all().order_by('kode'))
+
     pendapatan = []
     total_pendapatan = 0
-    for a in Akun.objects.filter(kategori='REVENUE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'REVENUE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             pendapatan.append({'nama': a.nama, 'nominal': s})
             total_pendapatan += s
 
     beban = []
     total_beban = 0
-    for a in Akun.objects.filter(kategori='EXPENSE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'EXPENSE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             beban.append({'nama': a.nama, 'nominal': s})
             total_beban += s
@@ -2692,18 +2765,25 @@ def export_laporan_pdf(request):
     periode_text = f"Bulan {BULAN_NAMES.get(bulan, '')} {tahun}" if bulan and tahun else "Periode Berjalan"
 
     # Hitung data
+    mutasi = get_mutasi_semua_akun({SEMUA: (start_date, end_date)})
+    akun_list = list(Akun.objects.all().order_by('kode'))
+
     pendapatan = []
     total_pendapatan = 0
-    for a in Akun.objects.filter(kategori='REVENUE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'REVENUE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             pendapatan.append({'nama': a.nama, 'nominal': s})
             total_pendapatan += s
 
     beban = []
     total_beban = 0
-    for a in Akun.objects.filter(kategori='EXPENSE'):
-        s = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        if a.kategori != 'EXPENSE':
+            continue
+        s = saldo_akun(a, mutasi)
         if s != 0:
             beban.append({'nama': a.nama, 'nominal': s})
             total_beban += s
@@ -2715,8 +2795,8 @@ def export_laporan_pdf(request):
     # Neraca Saldo
     neraca_saldo = []
     total_ns_debit = total_ns_kredit = 0
-    for a in Akun.objects.all().order_by('kode'):
-        saldo = get_saldo_akun(a, start_date, end_date)
+    for a in akun_list:
+        saldo = saldo_akun(a, mutasi)
         if saldo != 0:
             ns_d = ns_k = 0
             if a.saldo_normal == 'DEBIT':
@@ -2753,58 +2833,109 @@ def export_laporan_pdf(request):
 # ============================================================
 # BLOCKCHAIN EXPLORER & VERIFICATION
 # ============================================================
-from .blockchain import verify_blockchain_integrity, get_tampered_block_ids
+from .blockchain import refresh_verification_state, verify_block_range
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 import json
-from django.core.serializers.json import DjangoJSONEncoder
-import zipfile
-import io
 
 @login_required
 @owner_required
 def blockchain_explorer(request):
-    """Menampilkan halaman Blockchain Explorer (Khusus Owner)."""
-    logs = AuditLog.objects.all().order_by('-block_index')
+    """
+    Menampilkan halaman Blockchain Explorer (Khusus Owner).
+    Flag manipulasi dibaca dari hasil verifikasi tersimpan (AuditTamper),
+    hanya untuk blok di halaman ini — tidak ada hash ulang saat render.
+    """
+    from .models import AuditChainHead, AuditTamper, AuditVerifikasi
+
+    logs = AuditLog.objects.select_related('user').order_by('-block_index')
     page_obj = _paginate(request, logs, per_page=15)
-    tampered_ids = get_tampered_block_ids()
+    tampered_ids = set(AuditTamper.objects.filter(
+        log_id__in=[log.id for log in page_obj]
+    ).values_list('log_id', flat=True))
+    verifikasi = AuditVerifikasi.objects.filter(pk=1).first()
+    head = AuditChainHead.objects.filter(pk=1).first()
+    last_index = head.block_index if head else 0
+    blok_indexes = [log.block_index for log in page_obj]
 
     context = {
         'logs': page_obj,
         'page_obj': page_obj,
         'tampered_ids': tampered_ids,
-        'tampered_count': len(tampered_ids),
+        'tampered_count': verifikasi.jumlah_tamper if verifikasi else 0,
+        'verifikasi': verifikasi,
+        'belum_diverifikasi': max(last_index - (verifikasi.verified_until if verifikasi else 0), 0),
+        'range_dari': min(blok_indexes) if blok_indexes else 0,
+        'range_sampai': max(blok_indexes) if blok_indexes else 0,
     }
     return render(request, 'finance/blockchain_explorer.html', context)
 
 @login_required
 @owner_required
+def api_audit_chain_stats(request):
+    """API endpoint (JSON): statistik append audit (waktu tunggu lock chain head, fork)."""
+    from .signals import get_statistik_chain
+    return JsonResponse(get_statistik_chain())
+
+@login_required
+@owner_required
+@require_POST
 def verify_blockchain(request):
-    """API endpoint untuk memverifikasi chain."""
-    result = verify_blockchain_integrity()
+    """
+    API endpoint (POST) untuk memverifikasi chain (mode=deep untuk verifikasi penuh dari genesis).
+    Hasilnya disimpan sebagai status verifikasi yang dibaca explorer, karena itu hanya lewat POST.
+    Verifikasi multi-proses sengaja tidak tersedia lewat HTTP — gunakan
+    `python manage.py verify_blockchain --workers N`.
+    """
+    result = refresh_verification_state(deep=request.POST.get('mode') == 'deep')
     return JsonResponse(result)
 
+@login_required
+@owner_required
+@require_POST
+def api_verify_range(request):
+    """API endpoint (POST): hash ulang blok dari..sampai saja (satu halaman explorer), flag tamper disimpan."""
+    try:
+        dari = int(request.POST.get('dari', ''))
+        sampai = int(request.POST.get('sampai', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Parameter dari/sampai harus angka.'}, status=400)
+    if dari < 1 or sampai < dari or sampai - dari >= 500:
+        return JsonResponse({'error': 'Rentang tidak valid (maksimal 500 blok).'}, status=400)
+
+    tampered = verify_block_range(dari, sampai)
+    return JsonResponse({
+        'dari': dari,
+        'sampai': sampai,
+        'is_valid': not tampered,
+        'tampered_ids': sorted(tampered),
+    })
+
+@login_required
+@owner_required
+def api_audit_proof(request, block_index):
+    """API endpoint (JSON): Merkle inclusion proof untuk satu blok."""
+    from .merkle import get_inclusion_proof
+    proof = get_inclusion_proof(block_index)
+    if proof is None:
+        return JsonResponse({'error': f'Block #{block_index} tidak ditemukan.'}, status=404)
+    return JsonResponse(proof)
+
 @login_required
 @owner_required
 def backup_blockchain(request):
-    """Export seluruh blockchain ke JSON dengan Hash Certificate."""
-    from .blockchain import generate_hash
-    
-    logs = AuditLog.objects.all().order_by('block_index').values(
-        'block_index', 'block_hash', 'previous_hash', 'action', 'model_name',
-        'object_id', 'object_repr', 'changes', 'timestamp'
-    )
-    
-    logs_data = list(logs)
-    json_str = json.dumps(logs_data, cls=DjangoJSONEncoder, indent=2)
-    cert_hash = generate_hash(json_str)
-    
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        zip_file.writestr("blockchain_backup.json", json_str)
-        zip_file.writestr("hash_certificate.txt", f"Blockchain Backup Certificate\n---------------------------\nSHA-256: {cert_hash}\n\nSertifikat ini membuktikan keaslian backup data audit trail CV Borneo Mega Mandiri.")
-        
-    response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
-    response['Content-Disposition'] = f'attachment; filename="blockchain_backup_{timezone.now().strftime("%Y%m%d_%H%M%S")}.zip"'
+    """
+    Export blockchain ke ZIP (NDJSON + Merkle root + Hash Certificate) secara streaming.
+    ?sejak=N → backup inkremental, hanya blok setelah block N.
+    """
+    from django.http import StreamingHttpResponse
+    from .audit_backup import backup_filename, iter_backup_zip
+
+    sejak = request.GET.get('sejak', '')
+    sejak = int(sejak) if sejak.isdigit() else 0
+
+    response = StreamingHttpResponse(iter_backup_zip(sejak), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{backup_filename(sejak)}"'
     return response
 
 